@@ -4,12 +4,37 @@ Constants for Survey Data Processor.
 This module contains all constant values used throughout the application.
 """
 
-# Optional Windows-specific import
-try:
-    import win32com.client
-    WIN32_AVAILABLE = True
-except ImportError:
-    WIN32_AVAILABLE = False
+import importlib
+
+# Optional dependencies, probed on first access of their flag (PEP 562 module __getattr__)
+# so that importing this module never pays for a failed import
+_OPTIONAL_DEPENDENCIES = {
+    'WIN32_AVAILABLE': 'win32com.client',  # Windows-specific Excel automation
+}
+
+
+def __getattr__(name: str) -> bool:
+    """
+    Resolves the optional dependency flags lazily and caches the result as a module attribute.
+
+    Args:
+        name: The attribute being looked up
+
+    Returns:
+        bool: Whether the optional dependency can be imported
+    """
+    module_name = _OPTIONAL_DEPENDENCIES.get(name)
+    if module_name is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+    try:
+        importlib.import_module(module_name)
+        available = True
+    except ImportError:
+        available = False
+
+    globals()[name] = available
+    return available
 
 
 # ============================================================================
@@ -56,3 +81,10 @@ SINGLE_SELECT_WIDTHS = {
     'F': 3, 'G': 13, 'H': 3, 'I': 13, 'J': 13,
     'K': 13, 'L': 13, 'M': 13, 'N': 13
 }
+
+
+# ============================================================================
+# LOGGING
+# ============================================================================
+
+LOG_FORMAT = '%(asctime)s - %(levelname)s - %(message)s'
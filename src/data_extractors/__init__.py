@@ -1,20 +1,30 @@
 """Data extraction utilities for the data map worksheet."""
 
 from .data_map_extractor import (
+    DataMapSnapshot,
+    build_data_map_snapshot,
+    clear_data_map_cache,
+    find_question_row_fields,
     find_question_text_from_data_map,
     find_column_l_text_from_data_map,
     find_section_number_from_data_map,
     find_question_column_h_text,
+    build_question_h_index,
     find_other_specify_child_text,
     extract_bracketed_text,
     extract_response_options,
 )
 
 __all__ = [
+    'DataMapSnapshot',
+    'build_data_map_snapshot',
+    'clear_data_map_cache',
+    'find_question_row_fields',
     'find_question_text_from_data_map',
     'find_column_l_text_from_data_map',
     'find_section_number_from_data_map',
     'find_question_column_h_text',
+    'build_question_h_index',
     'find_other_specify_child_text',
     'extract_bracketed_text',
     'extract_response_options',
@@ -6,47 +6,178 @@ This module provides functions to extract and lookup information from the data m
 
 import logging
 import re
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
 
 import openpyxl
 from openpyxl.styles import Font
 
 from ..constants import SHEET_DATA_MAP
 
+# Matches the first "[...]" group, e.g. "[S1r6oe]: In which region..." -> "S1r6oe"
+_BRACKET_RE = re.compile(r'\[([^\]]+)\]')
 
-def find_question_text_from_data_map(data_map_ws: openpyxl.worksheet.worksheet.Worksheet, question_number: int) -> str:
+# COUNTIFS formula for the response option rows; {r} is the question tab row being counted
+_RESPONSE_COUNTIFS_TEMPLATE = (
+    "=COUNTIFS(OFFSET('raw data'!$C$3:$C$502, 0, MATCH($G$4, 'raw data'!$C$2:$AJC$2, 0)-1), $G{r}, "
+    "OFFSET('raw data'!$C$3:$C$502, 0, MATCH($I{r}, 'raw data'!$C$2:$AJC$2, 0)-1), $J{r}, "
+    "OFFSET('raw data'!$C$3:$C$502, 0, MATCH($K{r}, 'raw data'!$C$2:$AJC$2, 0)-1), $L{r}, "
+    "OFFSET('raw data'!$C$3:$C$502, 0, MATCH($M{r}, 'raw data'!$C$2:$AJC$2, 0)-1), $N{r})"
+)
+
+# Blue input font for the filter pattern cells. Mirrors formatters.styles.BLUE_FONT; importing
+# that module here would be circular, since formatters.worksheet imports this module.
+_BLUE_FONT = Font(color="0000FF")
+
+
+def _match_int(value, target_int: int, target_str: str) -> bool:
     """
-    Finds the question text from column C of the data map in the same row as the first instance
-    of the question number in column G.
+    Checks whether a cell value is the given question number, stored either as a number or as text.
+
+    Int cells are compared directly; only string cells are stripped.
+
+    Args:
+        value: The cell value to test
+        target_int: The question number
+        target_str: str(target_int), precomputed by the caller
+
+    Returns:
+        bool: True if the value matches the question number
+    """
+    if isinstance(value, int):
+        return value == target_int
+    return isinstance(value, str) and value.strip() == target_str
+
+
+@dataclass
+class DataMapSnapshot:
+    """
+    Plain-Python copy of the data map from row 4 down, read once per worksheet.
+
+    Attributes:
+        rows: Row tuples for columns A:P; position 0 is worksheet row 4
+        question_index: Maps column G values to the position of their first row (excluding "System")
+        col_c: Column C values, aligned with rows
+        col_g: Column G values, aligned with rows
+        col_h: Column H values, aligned with rows
+        col_p: Column P values, aligned with rows
+    """
+    rows: List[tuple]
+    question_index: Dict[str, int] = field(default_factory=dict)
+    col_c: List = field(default_factory=list)
+    col_g: List = field(default_factory=list)
+    col_h: List = field(default_factory=list)
+    col_p: List = field(default_factory=list)
+
+
+# Cached data map snapshots keyed by id() of the worksheet they were built from
+_DATA_MAP_SNAPSHOT_CACHE: Dict[int, Tuple[openpyxl.worksheet.worksheet.Worksheet, DataMapSnapshot]] = {}
+
+# Memoized find_question_row_fields results keyed by (id(worksheet), question number).
+# Entries are only added after the worksheet is held by _DATA_MAP_SNAPSHOT_CACHE, so its id cannot be reused.
+_QUESTION_FIELDS_CACHE: Dict[Tuple[int, int], Tuple[Optional[str], Optional[str], Optional[str]]] = {}
+
+
+def clear_data_map_cache() -> None:
+    """
+    Clears the cached data map snapshots and question lookups.
+
+    Call this before processing a new workbook so worksheets from earlier runs are released.
+    """
+    _DATA_MAP_SNAPSHOT_CACHE.clear()
+    _QUESTION_FIELDS_CACHE.clear()
+
+
+def build_data_map_snapshot(data_map_ws: openpyxl.worksheet.worksheet.Worksheet) -> DataMapSnapshot:
+    """
+    Streams the data map once from row 4 into a DataMapSnapshot.
+
+    Every lookup in this module works on the snapshot's lists, so the worksheet is only
+    read once per run. The result is cached per worksheet.
+
+    Args:
+        data_map_ws: The data map worksheet
+
+    Returns:
+        DataMapSnapshot: The row tuples, column G index and column lists of the data map
+    """
+    cached = _DATA_MAP_SNAPSHOT_CACHE.get(id(data_map_ws))
+    if cached is not None and cached[0] is data_map_ws:
+        return cached[1]
+
+    rows = list(data_map_ws.iter_rows(min_row=4, max_col=16, values_only=True))
+    snapshot = DataMapSnapshot(
+        rows=rows,
+        col_c=[row[2] for row in rows],
+        col_g=[row[6] for row in rows],
+        col_h=[row[7] for row in rows],
+        col_p=[row[15] for row in rows],
+    )
+
+    index = snapshot.question_index
+    for position, cell_value in enumerate(snapshot.col_g):
+        if cell_value is not None:
+            # Numeric cells need no stripping; only strings pay for strip()
+            cell_str = cell_value.strip() if isinstance(cell_value, str) else str(cell_value)
+            # Skip "System" entries and keep only the first instance of each question number
+            if cell_str != "System" and cell_str not in index:
+                index[cell_str] = position
+
+    _DATA_MAP_SNAPSHOT_CACHE[id(data_map_ws)] = (data_map_ws, snapshot)
+    logging.info(f"Indexed {len(index)} question numbers from {len(rows)} data map rows")
+    return snapshot
+
+
+def find_question_row_fields(data_map_ws: openpyxl.worksheet.worksheet.Worksheet, question_number: int) -> Tuple[Optional[str], Optional[str], Optional[str]]:
+    """
+    Finds the question text (column C), column L text and section number (column N) of the data map
+    in the same row as the first instance of the question number in column G.
 
     Args:
         data_map_ws: The data map worksheet
         question_number: The question number to search for (1-10)
 
     Returns:
-        str: The question text from column C, or None if not found
+        tuple: (question text, column L text, section number), each None if not found or empty
     """
+    cache_key = (id(data_map_ws), question_number)
+    if cache_key in _QUESTION_FIELDS_CACHE:
+        return _QUESTION_FIELDS_CACHE[cache_key]
+
     try:
-        # Search through column G starting from row 4 (where data begins)
-        for row in range(4, data_map_ws.max_row + 1):
-            cell_value = data_map_ws.cell(row=row, column=7).value  # Column G = 7
-
-            if cell_value is not None:
-                cell_str = str(cell_value).strip()
-
-                # Check if this matches our question number
-                if cell_str == str(question_number):
-                    # Found the question, get column C value from same row
-                    question_text = data_map_ws.cell(row=row, column=3).value  # Column C = 3
-                    if question_text:
-                        return str(question_text).strip()
-                    else:
-                        return None
+        snapshot = build_data_map_snapshot(data_map_ws)
+        position = snapshot.question_index.get(str(question_number))
+        if position is None:
+            fields = (None, None, None)
+        else:
+            # Found the question, get columns C, L and N from the same row
+            row = snapshot.rows[position]
+            fields = tuple(
+                str(value).strip() if value else None
+                for value in (row[2], row[11], row[13])  # Columns C, L, N
+            )
 
-        return None
+        _QUESTION_FIELDS_CACHE[cache_key] = fields
+        return fields
 
     except Exception as e:
-        logging.error(f"Error finding question text for question {question_number}: {e}")
-        return None
+        logging.error(f"Error finding data map fields for question {question_number}: {e}")
+        return None, None, None
+
+
+def find_question_text_from_data_map(data_map_ws: openpyxl.worksheet.worksheet.Worksheet, question_number: int) -> str:
+    """
+    Finds the question text from column C of the data map in the same row as the first instance
+    of the question number in column G.
+
+    Args:
+        data_map_ws: The data map worksheet
+        question_number: The question number to search for (1-10)
+
+    Returns:
+        str: The question text from column C, or None if not found
+    """
+    return find_question_row_fields(data_map_ws, question_number)[0]
 
 
 def find_column_l_text_from_data_map(data_map_ws: openpyxl.worksheet.worksheet.Worksheet, question_number: int) -> str:
@@ -61,28 +192,7 @@ def find_column_l_text_from_data_map(data_map_ws: openpyxl.worksheet.worksheet.W
     Returns:
         str: The text from column L, or None if not found
     """
-    try:
-        # Search through column G starting from row 4 (where data begins)
-        for row in range(4, data_map_ws.max_row + 1):
-            cell_value = data_map_ws.cell(row=row, column=7).value  # Column G = 7
-
-            if cell_value is not None:
-                cell_str = str(cell_value).strip()
-
-                # Check if this matches our question number
-                if cell_str == str(question_number):
-                    # Found the question, get column L value from same row
-                    column_l_text = data_map_ws.cell(row=row, column=12).value  # Column L = 12
-                    if column_l_text:
-                        return str(column_l_text).strip()
-                    else:
-                        return None
-
-        return None
-
-    except Exception as e:
-        logging.error(f"Error finding column L text for question {question_number}: {e}")
-        return None
+    return find_question_row_fields(data_map_ws, question_number)[1]
 
 
 def find_section_number_from_data_map(data_map_ws: openpyxl.worksheet.worksheet.Worksheet, question_number: int) -> str:
@@ -97,28 +207,38 @@ def find_section_number_from_data_map(data_map_ws: openpyxl.worksheet.worksheet.
     Returns:
         str: The section number from column N, or None if not found
     """
-    try:
-        # Search through column G starting from row 4 (where data begins)
-        for row in range(4, data_map_ws.max_row + 1):
-            cell_value = data_map_ws.cell(row=row, column=7).value  # Column G = 7
-
-            if cell_value is not None:
-                cell_str = str(cell_value).strip()
-
-                # Check if this matches our question number
-                if cell_str == str(question_number):
-                    # Found the question, get column N value from same row
-                    section_number = data_map_ws.cell(row=row, column=14).value  # Column N = 14
-                    if section_number:
-                        return str(section_number).strip()
-                    else:
-                        return None
+    return find_question_row_fields(data_map_ws, question_number)[2]
 
-        return None
 
-    except Exception as e:
-        logging.error(f"Error finding section number for question {question_number}: {e}")
-        return None
+def _column_h_text_at(snapshot: DataMapSnapshot, position: int, question_number: int) -> Optional[str]:
+    """
+    Returns the column H text of a question's first data map row.
+
+    Args:
+        snapshot: The data map snapshot
+        position: Position of the question's first row in the snapshot
+        question_number: The question number, used for the fallback description
+
+    Returns:
+        str: The column H value, the column C text if column H is a formula, or None if empty
+    """
+    column_h_value = snapshot.col_h[position]
+
+    # Check if it's a formula that needs evaluation
+    if column_h_value and isinstance(column_h_value, str) and column_h_value.startswith('='):
+        # Instead of trying to evaluate complex formulas, let's get the question info from column C
+        # which contains the actual question text and information
+        question_info = snapshot.col_c[position]
+        if question_info and str(question_info).strip():
+            return str(question_info).strip()
+        else:
+            return f"Question {question_number} data from row {position + 4}"
+    else:
+        # Not a formula, return the value directly
+        if column_h_value is not None:
+            return str(column_h_value).strip()
+        else:
+            return None
 
 
 def find_question_column_h_text(data_map_ws: openpyxl.worksheet.worksheet.Worksheet, question_number: int) -> str:
@@ -134,45 +254,52 @@ def find_question_column_h_text(data_map_ws: openpyxl.worksheet.worksheet.Worksh
         str: The evaluated value from column H, or None if not found
     """
     try:
-        # Search through column G starting from row 4 (where data begins)
-        for row in range(4, data_map_ws.max_row + 1):
-            cell_value = data_map_ws.cell(row=row, column=7).value  # Column G = 7
-
-            if cell_value is not None:
-                cell_str = str(cell_value).strip()
-                # Skip "System" entries
-                if cell_str == "System":
-                    continue
-
-                # Check if this matches our question number
-                if cell_str == str(question_number):
-                    # Found the question, get column H value from same row
-                    column_h_value = data_map_ws.cell(row=row, column=8).value  # Column H = 8
-
-                    # Check if it's a formula that needs evaluation
-                    if column_h_value and isinstance(column_h_value, str) and column_h_value.startswith('='):
-                        # Instead of trying to evaluate complex formulas, let's get the question info from column C
-                        # which contains the actual question text and information
-                        question_info = data_map_ws.cell(row=row, column=3).value  # Column C
-                        if question_info and str(question_info).strip():
-                            return str(question_info).strip()
-                        else:
-                            return f"Question {question_number} data from row {row}"
-                    else:
-                        # Not a formula, return the value directly
-                        if column_h_value is not None:
-                            return str(column_h_value).strip()
-                        else:
-                            return None
-
-        # Question number not found
-        return None
+        snapshot = build_data_map_snapshot(data_map_ws)
+        position = snapshot.question_index.get(str(question_number))
+        if position is None:
+            # Question number not found
+            return None
+
+        # Found the question, get column H value from same row
+        return _column_h_text_at(snapshot, position, question_number)
 
     except Exception as e:
         logging.error(f"Error finding column H text for question {question_number}: {e}")
         return None
 
 
+def build_question_h_index(data_map_ws: openpyxl.worksheet.worksheet.Worksheet) -> Dict[int, str]:
+    """
+    Builds a mapping of every numeric question number in column G to its column H text,
+    as find_question_column_h_text would return it.
+
+    Args:
+        data_map_ws: The data map worksheet
+
+    Returns:
+        dict: Question number to column H text; questions with an empty column H are omitted
+    """
+    try:
+        snapshot = build_data_map_snapshot(data_map_ws)
+        h_index = {}
+
+        for key, position in snapshot.question_index.items():
+            # Only canonical integers, matching the str(question_number) lookup of the single finder
+            if not key.isdigit() or str(int(key)) != key:
+                continue
+            question_number = int(key)
+            column_h_text = _column_h_text_at(snapshot, position, question_number)
+            if column_h_text is not None:
+                h_index[question_number] = column_h_text
+
+        logging.info(f"Indexed column H text for {len(h_index)} questions")
+        return h_index
+
+    except Exception as e:
+        logging.error(f"Error building column H index: {e}")
+        return {}
+
+
 def find_other_specify_child_text(data_map_ws: openpyxl.worksheet.worksheet.Worksheet, question_number: int) -> str:
     """
     Finds the "Other Specify Child" question text from column C of the data map.
@@ -190,26 +317,28 @@ def find_other_specify_child_text(data_map_ws: openpyxl.worksheet.worksheet.Work
     """
     try:
         target_h_pattern = "0, Open Text, 0, 0, , 0, 0, 0, 0, Other Specify Child"
+        # Column G holds either numbers or text, so match against both forms of the question number
+        target_str = str(question_number)
+        target_int = question_number
 
-        # Search through all rows starting from row 4 (where data begins)
-        for row in range(4, data_map_ws.max_row + 1):
-            # Check column G for question number match
-            column_g_value = data_map_ws.cell(row=row, column=7).value  # Column G = 7
-            # Check column H for the specific pattern
-            column_h_value = data_map_ws.cell(row=row, column=8).value  # Column H = 8
+        snapshot = build_data_map_snapshot(data_map_ws)
 
-            if (column_g_value is not None and
-                str(column_g_value).strip() == str(question_number) and
-                column_h_value is not None and
-                str(column_h_value).strip() == target_h_pattern):
+        # Check column G for question number match and column H for the specific pattern
+        for position, (column_g_value, column_h_value) in enumerate(zip(snapshot.col_g, snapshot.col_h)):
+            if (_match_int(column_g_value, target_int, target_str) and
+                isinstance(column_h_value, str) and
+                # Cheap suffix test first; the full signature is only compared for child rows
+                column_h_value.rstrip().endswith("Other Specify Child") and
+                column_h_value.strip() == target_h_pattern):
 
                 # Found the matching row, get column C value (question text)
-                question_text = data_map_ws.cell(row=row, column=3).value  # Column C = 3
+                row_num = position + 4  # Snapshot position 0 is worksheet row 4
+                question_text = snapshot.col_c[position]
                 if question_text:
-                    logging.info(f"Found Other Specify Child text at row {row} for question {question_number}")
+                    logging.info(f"Found Other Specify Child text at row {row_num} for question {question_number}")
                     return str(question_text).strip()
                 else:
-                    logging.warning(f"Found matching row {row} but column C is empty")
+                    logging.warning(f"Found matching row {row_num} but column C is empty")
                     return None
 
         logging.info(f"No Other Specify Child pattern found for question {question_number}")
@@ -234,7 +363,7 @@ def extract_bracketed_text(text: str) -> str:
     """
     try:
         # Find the first occurrence of text within square brackets
-        match = re.search(r'\[([^\]]+)\]', text)
+        match = _BRACKET_RE.search(text)
         if match:
             return match.group(1)  # Return the content inside brackets
         else:
@@ -245,7 +374,7 @@ def extract_bracketed_text(text: str) -> str:
         return None
 
 
-def extract_response_options(data_map_ws: openpyxl.worksheet.worksheet.Worksheet, question_ws: openpyxl.worksheet.worksheet.Worksheet, question_number: int) -> None:
+def extract_response_options(data_map_ws: openpyxl.worksheet.worksheet.Worksheet, question_ws: openpyxl.worksheet.worksheet.Worksheet, question_number: int) -> Optional[int]:
     """
     Extracts response options from the data map and places them in the question worksheet.
 
@@ -253,6 +382,9 @@ def extract_response_options(data_map_ws: openpyxl.worksheet.worksheet.Worksheet
         data_map_ws: The data map worksheet
         question_ws: The question worksheet to populate
         question_number: The question number to process
+
+    Returns:
+        Optional[int]: The row holding the "<>" terminator, or None if no response options were placed
     """
     try:
         logging.info(f"Extracting response options for question {question_number}")
@@ -261,33 +393,34 @@ def extract_response_options(data_map_ws: openpyxl.worksheet.worksheet.Worksheet
         section_number = find_section_number_from_data_map(data_map_ws, question_number)
         if not section_number:
             logging.warning(f"No section number found for question {question_number}")
-            return
+            return None
 
         logging.info(f"Found section number for question {question_number}: {section_number}")
 
-        # Step 2: Find all rows with "Select Option [section]" in column P
+        # Step 2: Find all rows with "Select Option [section]" in column P,
+        # keeping the response number (column D) and text (column E) from the same pass
         target_pattern = f"Select Option {section_number}"
         response_rows = []
 
-        for row in range(4, data_map_ws.max_row + 1):
-            column_p_value = data_map_ws.cell(row=row, column=16).value  # Column P = 16
-            if column_p_value and str(column_p_value).strip() == target_pattern:
-                response_rows.append(row)
+        snapshot = build_data_map_snapshot(data_map_ws)
+        for position, column_p_value in enumerate(snapshot.col_p):
+            if isinstance(column_p_value, str) and column_p_value.strip() == target_pattern:
+                row = snapshot.rows[position]
+                response_rows.append((row[3], row[4]))  # Columns D, E
+            elif response_rows:
+                # A section's options are contiguous, so the first non-matching row ends the run
+                break
 
         logging.info(f"Found {len(response_rows)} response option rows for '{target_pattern}'")
 
         if not response_rows:
             logging.warning(f"No response options found for pattern '{target_pattern}'")
-            return
+            return None
 
         # Step 3: Extract response numbers (column D) and text (column E)
         current_row = 6  # Start placing at row 6
 
-        for data_row in response_rows:
-            # Get response number from column D
-            response_number = data_map_ws.cell(row=data_row, column=4).value  # Column D = 4
-            # Get response text from column E
-            response_text = data_map_ws.cell(row=data_row, column=5).value  # Column E = 5
+        for response_number, response_text in response_rows:
 
             # Place in question worksheet
             if response_number is not None:
@@ -305,31 +438,26 @@ def extract_response_options(data_map_ws: openpyxl.worksheet.worksheet.Worksheet
         logging.info(f"Added terminator '<>' at row {current_row}")
 
         # Step 5: Add COUNTIFS formula to column D starting at row 6
-        formula = '=COUNTIFS(OFFSET(\'raw data\'!$C$3:$C$502, 0, MATCH($G$4, \'raw data\'!$C$2:$AJC$2, 0)-1), $G6, OFFSET(\'raw data\'!$C$3:$C$502, 0, MATCH($I6, \'raw data\'!$C$2:$AJC$2, 0)-1), $J6, OFFSET(\'raw data\'!$C$3:$C$502, 0, MATCH($K6, \'raw data\'!$C$2:$AJC$2, 0)-1), $L6, OFFSET(\'raw data\'!$C$3:$C$502, 0, MATCH($M6, \'raw data\'!$C$2:$AJC$2, 0)-1), $N6)'
-
-        # Add formula to D6 and drag down to include the terminator row (current_row has "<>")
+        # and drag down to include the terminator row (current_row has "<>")
         for formula_row in range(6, current_row + 1):  # Include the "<>" row
-            # Adjust the formula for the current row by replacing "6" with the current row number
-            adjusted_formula = formula.replace('$G6', f'$G{formula_row}').replace('$I6', f'$I{formula_row}').replace('$J6', f'$J{formula_row}').replace('$K6', f'$K{formula_row}').replace('$L6', f'$L{formula_row}').replace('$M6', f'$M{formula_row}').replace('$N6', f'$N{formula_row}')
-            question_ws.cell(row=formula_row, column=4, value=adjusted_formula)  # Column D = 4
+            question_ws.cell(row=formula_row, column=4, value=_RESPONSE_COUNTIFS_TEMPLATE.format(r=formula_row))  # Column D = 4
 
         # Step 6: Add "record" and "<>" pattern to columns I:N starting at row 6 with blue font
         pattern_values = ["record", "<>", "record", "<>", "record", "<>"]  # I, J, K, L, M, N
-        blue_font = Font(color="0000FF")
 
-        for row_num in range(6, current_row + 1):  # Include the "<>" row
-            for col_index, value in enumerate(pattern_values):
-                col_num = 9 + col_index  # Column I = 9, J = 10, K = 11, L = 12, M = 13, N = 14
-                question_ws.cell(row=row_num, column=col_num, value=value).font = blue_font
+        # Include the "<>" row; columns I = 9 through N = 14
+        for row_cells in question_ws.iter_rows(min_row=6, max_row=current_row, min_col=9, max_col=14):
+            for cell, value in zip(row_cells, pattern_values):
+                cell.value = value
+                cell.font = _BLUE_FONT
 
         # Step 7: Add percentage formula to column E starting at row 6
         # The denominator is the absolute reference to the cell in column D next to the "<>" in column C
         denominator_row = current_row  # This is the row with "<>" in column C
 
-        for row_num in range(6, current_row + 1):  # Include the "<>" row
+        for row_num, (cell,) in enumerate(question_ws.iter_rows(min_row=6, max_row=current_row, min_col=5, max_col=5), start=6):
             # Create percentage formula: relative numerator / absolute denominator
-            percentage_formula = f"=D{row_num}/$D${denominator_row}"
-            cell = question_ws.cell(row=row_num, column=5, value=percentage_formula)  # Column E = 5
+            cell.value = f"=D{row_num}/$D${denominator_row}"
             # Format as percentage
             cell.number_format = '0.0%'
 
@@ -338,6 +466,8 @@ def extract_response_options(data_map_ws: openpyxl.worksheet.worksheet.Worksheet
         logging.info(f"Added percentage formula to column E from row 6 to {current_row} with denominator $D${denominator_row}")
         logging.info(f"Successfully extracted {len(response_rows)} response options for question {question_number}")
 
+        return current_row
+
     except Exception as e:
         logging.error(f"Error extracting response options for question {question_number}: {e}")
         raise
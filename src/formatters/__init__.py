@@ -1,6 +1,14 @@
 """Formatting utilities for Excel worksheets."""
 
-from .styles import create_pale_blue_fill, create_thin_border, create_thin_bottom_border
+from .styles import (
+    BOLD_FONT,
+    BLUE_FONT,
+    CENTER_ALIGN,
+    THIN_BOTTOM_BORDER,
+    create_pale_blue_fill,
+    create_thin_border,
+    create_thin_bottom_border,
+)
 from .worksheet import (
     apply_column_widths,
     setup_question_basic_formatting,
@@ -11,6 +19,10 @@ from .worksheet import (
 )
 
 __all__ = [
+    'BOLD_FONT',
+    'BLUE_FONT',
+    'CENTER_ALIGN',
+    'THIN_BOTTOM_BORDER',
     'create_pale_blue_fill',
     'create_thin_border',
     'create_thin_bottom_border',
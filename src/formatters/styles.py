@@ -4,10 +4,17 @@ Styling utilities for Excel worksheets.
 This module provides functions to create reusable style objects for formatting Excel cells.
 """
 
-from openpyxl.styles import Border, Side, PatternFill
+from openpyxl.styles import Alignment, Border, Font, Side, PatternFill
 
 from ..constants import COLOR_PALE_BLUE
 
+# Shared style instances for the question tabs; openpyxl dedupes styles by value,
+# so one instance of each serves every worksheet
+BOLD_FONT = Font(bold=True)
+BLUE_FONT = Font(color="0000FF")
+CENTER_ALIGN = Alignment(horizontal='center')
+THIN_BOTTOM_BORDER = Border(bottom=Side(style='thin'))
+
 
 def create_pale_blue_fill() -> PatternFill:
     """Create and return a pale blue fill pattern."""
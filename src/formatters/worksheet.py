@@ -5,10 +5,9 @@ This module provides functions for formatting Excel worksheets with headers, ali
 """
 
 import logging
-from typing import Dict
+from typing import Dict, Optional
 
 import openpyxl
-from openpyxl.styles import Alignment, Font
 from openpyxl.utils import column_index_from_string
 
 from ..constants import (
@@ -17,11 +16,13 @@ from ..constants import (
     SINGLE_SELECT_WITH_OTHER_WIDTHS,
     SINGLE_SELECT_WIDTHS,
 )
-from ..data_extractors.data_map_extractor import (
-    find_question_text_from_data_map,
-    find_column_l_text_from_data_map,
-)
-from .styles import create_thin_bottom_border
+from ..data_extractors.data_map_extractor import find_question_row_fields
+from .styles import BOLD_FONT, CENTER_ALIGN, THIN_BOTTOM_BORDER
+
+# Columns D, E, G and I:N
+CENTER_COL_INDICES = tuple(column_index_from_string(c) for c in ('D', 'E', 'G', 'I', 'J', 'K', 'L', 'M', 'N'))
+# Positions of those columns within a row slice that starts at column D
+_CENTER_COL_OFFSETS = tuple(col - CENTER_COL_INDICES[0] for col in CENTER_COL_INDICES)
 
 
 def apply_column_widths(worksheet: openpyxl.worksheet.worksheet.Worksheet, width_config: Dict[str, int]) -> None:
@@ -32,8 +33,9 @@ def apply_column_widths(worksheet: openpyxl.worksheet.worksheet.Worksheet, width
         worksheet: The worksheet to apply widths to
         width_config: Dictionary mapping column letters to width values
     """
+    dims = worksheet.column_dimensions
     for col, width in width_config.items():
-        worksheet.column_dimensions[col].width = width
+        dims[col].width = width
 
 
 def setup_question_basic_formatting(question_ws: openpyxl.worksheet.worksheet.Worksheet, include_other: bool = False) -> None:
@@ -64,20 +66,20 @@ def add_question_text_and_section_header(question_ws: openpyxl.worksheet.workshe
         question_number: The question number (1-10)
         workbook: The workbook containing the data map tab (optional)
     """
-    if workbook and SHEET_DATA_MAP in [ws.title for ws in workbook.worksheets]:
+    if workbook and SHEET_DATA_MAP in workbook.sheetnames:
         data_map_ws = workbook[SHEET_DATA_MAP]
-        question_text = find_question_text_from_data_map(data_map_ws, question_number)
+        # Columns C and L come from the same data map row, so look them up together
+        question_text, column_l_text, _ = find_question_row_fields(data_map_ws, question_number)
         if question_text:
             question_ws['C2'] = question_text
-            question_ws['C2'].font = Font(bold=True)
+            question_ws['C2'].font = BOLD_FONT
             logging.info(f"Added question text to C2: {question_text[:50]}...")
         else:
             question_ws['C2'] = f"Question {question_number} text not found"
-            question_ws['C2'].font = Font(bold=True)
+            question_ws['C2'].font = BOLD_FONT
             logging.warning(f"Question text not found for question {question_number}")
 
-        # Find and place column L text from data map in G4
-        column_l_text = find_column_l_text_from_data_map(data_map_ws, question_number)
+        # Place column L text from data map in G4
         if column_l_text:
             question_ws['G4'] = column_l_text
             logging.info(f"Added column L text to G4: {column_l_text}")
@@ -86,7 +88,7 @@ def add_question_text_and_section_header(question_ws: openpyxl.worksheet.workshe
             logging.warning(f"Column L text not found for question {question_number}")
     else:
         question_ws['C2'] = f"Question {question_number} - data map not available"
-        question_ws['C2'].font = Font(bold=True)
+        question_ws['C2'].font = BOLD_FONT
         question_ws['G4'] = "Data map not available"
         logging.warning("Data map not available for question text lookup")
 
@@ -110,31 +112,27 @@ def add_row4_headers(question_ws: openpyxl.worksheet.worksheet.Worksheet, includ
     question_ws['N4'] = 'Filter #3'
 
     # Add thin bottom borders to header cells
-    thin_bottom_border = create_thin_bottom_border()
-    header_cells = ['C4', 'D4', 'E4', 'G4', 'I4', 'J4', 'K4', 'L4', 'M4', 'N4']
-    if include_q_header:
-        header_cells.append('Q4')
+    header_columns = 'CDEGIJKLMNQ' if include_q_header else 'CDEGIJKLMN'
+    for col_letter in header_columns:
+        question_ws[f'{col_letter}4'].border = THIN_BOTTOM_BORDER
 
-    for cell_ref in header_cells:
-        question_ws[cell_ref].border = thin_bottom_border
 
-
-def apply_center_alignment_to_columns(question_ws: openpyxl.worksheet.worksheet.Worksheet, include_q_column: bool = False) -> None:
+def apply_center_alignment_to_columns(question_ws: openpyxl.worksheet.worksheet.Worksheet, include_q_column: bool = False, max_row: Optional[int] = None) -> None:
     """
     Apply center alignment to standard columns in a question worksheet.
 
     Args:
         question_ws: The worksheet to apply alignment to
         include_q_column: Whether to include column Q for "other specify" functionality
+        max_row: Last row of the response block (the "<>" terminator row). Defaults to the worksheet's max_row.
     """
-    center_alignment = Alignment(horizontal='center')
-    center_columns = ['D', 'E', 'G', 'I', 'J', 'K', 'L', 'M', 'N']
+    if max_row is None:
+        max_row = question_ws.max_row
 
-    for col_letter in center_columns:
-        for row in question_ws.iter_rows(min_col=column_index_from_string(col_letter),
-                                       max_col=column_index_from_string(col_letter)):
-            for cell in row:
-                cell.alignment = center_alignment
+    # Walk the header and response block once; columns F and H stay left-aligned
+    for row in question_ws.iter_rows(min_row=4, max_row=max_row, min_col=CENTER_COL_INDICES[0], max_col=CENTER_COL_INDICES[-1]):
+        for offset in _CENTER_COL_OFFSETS:
+            row[offset].alignment = CENTER_ALIGN
 
     columns_str = "D:E, G, I:N"
     if include_q_column:
@@ -142,22 +140,28 @@ def apply_center_alignment_to_columns(question_ws: openpyxl.worksheet.worksheet.
     logging.info(f"Applied center alignment to columns {columns_str}")
 
 
-def add_cross_cut_section(question_ws: openpyxl.worksheet.worksheet.Worksheet) -> int:
+def add_cross_cut_section(question_ws: openpyxl.worksheet.worksheet.Worksheet, terminator_row: Optional[int] = None) -> int:
     """
     Add the "Cross Cut" section below the response options.
 
     Args:
         question_ws: The worksheet to add the section to
+        terminator_row: The row holding the "<>" terminator, as returned by extract_response_options.
+            When omitted, column C is scanned for the last row with text.
 
     Returns:
         int: The row number where the Cross Cut section was added
     """
-    # Find the last row with text in column C (should contain "<>")
-    last_row_with_text = 6  # Start from row 6 where response options begin
-    for row in range(6, question_ws.max_row + 1):
-        cell_value = question_ws.cell(row=row, column=3).value  # Column C = 3
-        if cell_value is not None and str(cell_value).strip():
-            last_row_with_text = row
+    if terminator_row is not None:
+        # The "<>" terminator is the last row with text in column C
+        last_row_with_text = terminator_row
+    else:
+        # Find the last row with text in column C (should contain "<>")
+        last_row_with_text = 6  # Start from row 6 where response options begin
+        # Column C = 3; values_only yields plain tuples rather than Cell objects
+        for row, (cell_value,) in enumerate(question_ws.iter_rows(min_row=6, min_col=3, max_col=3, values_only=True), start=6):
+            if cell_value is not None and str(cell_value).strip():
+                last_row_with_text = row
 
     # Place lowercase "x" in column B, two rows below the last row with text
     new_section_row = last_row_with_text + 2
@@ -165,9 +169,9 @@ def add_cross_cut_section(question_ws: openpyxl.worksheet.worksheet.Worksheet) -
     question_ws.cell(row=new_section_row, column=3, value='Cross Cut')  # Column C = 3
 
     # Add bottom border to cells C through N in the new section row
-    thin_bottom_border = create_thin_bottom_border()
-    for col in range(3, 15):  # Column C = 3, Column N = 14, so range(3, 15) covers C:N
-        question_ws.cell(row=new_section_row, column=col).border = thin_bottom_border
+    # Column C = 3 through Column N = 14
+    for cell in next(question_ws.iter_rows(min_row=new_section_row, max_row=new_section_row, min_col=3, max_col=14)):
+        cell.border = THIN_BOTTOM_BORDER
 
     logging.info(f"Added 'x' marker in B{new_section_row} and 'Cross Cut' text in C{new_section_row} for additional analysis section")
     logging.info(f"Applied bottom border to cells C{new_section_row}:N{new_section_row}")
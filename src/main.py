@@ -8,33 +8,78 @@ Main entry point for command-line execution.
 import argparse
 import logging
 
-from .pipeline import process_excel_file
-from .utils.file_utils import get_next_version_filename
+from .constants import LOG_FORMAT
+from .pipeline import process_excel_file, process_excel_files
+from .utils.file_utils import get_next_version_filename, get_next_version_filenames
+
+
+def positive_int(value: str) -> int:
+    """
+    Argparse type for options that need a whole number of at least 1.
+
+    Args:
+        value (str): The command-line value
+
+    Returns:
+        int: The parsed value
+
+    Raises:
+        argparse.ArgumentTypeError: If the value is not a positive integer
+    """
+    try:
+        number = int(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"invalid int value: '{value}'")
+    if number < 1:
+        raise argparse.ArgumentTypeError(f"must be at least 1, got {number}")
+    return number
 
 
 def main():
     """
     Main entry point for the survey processor v4.
     """
-    logging.basicConfig(
-        level=logging.INFO,
-        format='%(asctime)s - %(levelname)s - %(message)s'
-    )
-
     parser = argparse.ArgumentParser(
         description='Process survey Excel files with improved functionality'
     )
-    parser.add_argument('input_file', help='Path to the input Excel file')
-    parser.add_argument('--output_file', help='Path for the output processed file (optional, auto-versions if not provided)')
+    parser.add_argument('input_files', nargs='+', metavar='input_file',
+                        help='Path to the input Excel file; several files are processed in parallel')
+    parser.add_argument('--output_file', help='Path for the output processed file (optional, single input only, auto-versions if not provided)')
+    parser.add_argument('--workers', type=positive_int, help='Number of worker processes when several input files are given (default: one per CPU)')
+
+    parser.add_argument('--debug', action='store_true', help='Enable debug logging and keep a copy of the workbook with formulas')
 
     args = parser.parse_args()
 
+    logging.basicConfig(
+        level=logging.DEBUG if args.debug else logging.INFO,
+        format=LOG_FORMAT
+    )
+
+    if len(args.input_files) > 1:
+        if args.output_file:
+            parser.error("--output_file can only be used with a single input file")
+
+        # Reserve one versioned output filename per input before any worker starts writing
+        output_files = get_next_version_filenames(len(args.input_files))
+        errors = process_excel_files(list(zip(args.input_files, output_files)), max_workers=args.workers)
+
+        for input_file, output_file, error in zip(args.input_files, output_files, errors):
+            if error is None:
+                print(f"Successfully processed: {input_file} -> {output_file}")
+            else:
+                print(f"Error processing {input_file}: {error}")
+
+        return 1 if any(error is not None for error in errors) else 0
+
+    input_file = args.input_files[0]
+
     # Auto-generate versioned output filename if not provided
     output_file = args.output_file if args.output_file else get_next_version_filename()
 
     try:
-        process_excel_file(args.input_file, output_file)
-        print(f"Successfully processed: {args.input_file} -> {output_file}")
+        process_excel_file(input_file, output_file)
+        print(f"Successfully processed: {input_file} -> {output_file}")
     except Exception as e:
         print(f"Error: {e}")
         return 1
@@ -5,27 +5,45 @@ This module coordinates the overall survey data processing workflow.
 """
 
 import logging
+import os
+import shutil
+from concurrent.futures import ProcessPoolExecutor, as_completed
 from pathlib import Path
+from typing import List, Optional, Tuple
 
 import openpyxl
 
-from .constants import SHEET_DATA_MAP
+from .constants import SHEET_DATA_MAP, LOG_FORMAT
 from .setup.initial_setup import initial_set_up
 from .setup.raw_data import raw_data_initial_setup
 from .setup.data_map import data_map_initial_setup
 from .setup.column_question_map import column_question_map_initial_setup
-from .data_extractors.data_map_extractor import find_question_column_h_text
+from .data_extractors.data_map_extractor import (
+    build_question_h_index,
+    clear_data_map_cache,
+)
 from .question_types.single_select_with_other import cut_single_select_with_other
 from .question_types.single_select import cut_single_select
 from .utils.excel_calculator import calculate_excel_formulas
+from .utils.error_handling import log_errors
 
+# Question type setup keyed by the column H signature of the question's data map row
+_QUESTION_TYPE_HANDLERS = {
+    "0, 0, 0, Simple Select, , 0, 0, 0, 0, Other Specify Parent": (cut_single_select_with_other, "single select with other"),
+    "0, 0, 0, Simple Select, , 0, 0, 0, 0, 0": (cut_single_select, "single select"),
+}
 
-def load_raw_excel_file(file_path: str) -> openpyxl.Workbook:
+
+@log_errors("loading Excel file {file_path}")
+def load_raw_excel_file(file_path: str, read_only: bool = False) -> openpyxl.Workbook:
     """
     Loads an Excel file and returns an openpyxl Workbook object for processing.
 
     Args:
         file_path (str): Path to the Excel file.
+        read_only (bool): Open a streaming read-only workbook. Use this when the caller only
+            inspects sheet names or values; read-only workbooks cannot be modified or saved and
+            should be closed when done.
 
     Returns:
         openpyxl.Workbook: The loaded workbook.
@@ -34,21 +52,18 @@ def load_raw_excel_file(file_path: str) -> openpyxl.Workbook:
         FileNotFoundError: If the file doesn't exist.
         ValueError: If the file is not a valid Excel file.
     """
-    try:
-        file_path_obj = Path(file_path)
-        if not file_path_obj.exists():
-            raise FileNotFoundError(f"File not found: {file_path}")
+    file_path_obj = Path(file_path)
+    if not file_path_obj.exists():
+        raise FileNotFoundError(f"File not found: {file_path}")
 
-        if file_path_obj.suffix.lower() not in ['.xlsx', '.xlsm', '.xls']:
-            raise ValueError(f"Not a valid Excel file: {file_path}")
+    if file_path_obj.suffix.lower() not in ['.xlsx', '.xlsm', '.xls']:
+        raise ValueError(f"Not a valid Excel file: {file_path}")
 
-        logging.info(f"Loading Excel file: {file_path}")
-        return openpyxl.load_workbook(file_path)
-    except Exception as e:
-        logging.error(f"Error loading Excel file {file_path}: {e}")
-        raise
+    logging.info(f"Loading Excel file: {file_path}" + (" (read-only)" if read_only else ""))
+    return openpyxl.load_workbook(file_path, read_only=read_only)
 
 
+@log_errors("saving processed workbook to {output_path}")
 def save_processed_excel(workbook: openpyxl.Workbook, output_path: str) -> None:
     """
     Saves the processed workbook to the specified output path.
@@ -61,17 +76,14 @@ def save_processed_excel(workbook: openpyxl.Workbook, output_path: str) -> None:
         PermissionError: If unable to write to the file.
         OSError: If there's an OS-related error during saving.
     """
-    try:
-        output_path_obj = Path(output_path)
-        output_path_obj.parent.mkdir(parents=True, exist_ok=True)
+    output_path_obj = Path(output_path)
+    output_path_obj.parent.mkdir(parents=True, exist_ok=True)
 
-        workbook.save(output_path)
-        logging.info(f"Processed workbook saved successfully to: {output_path}")
-    except Exception as e:
-        logging.error(f"Error saving processed workbook to {output_path}: {e}")
-        raise
+    workbook.save(output_path)
+    logging.info(f"Processed workbook saved successfully to: {output_path}")
 
 
+@log_errors("during question cutting processor")
 def question_cutting_processor(workbook: openpyxl.Workbook) -> None:
     """
     Creates Q1-Q10 tabs for question processing.
@@ -79,19 +91,15 @@ def question_cutting_processor(workbook: openpyxl.Workbook) -> None:
     Args:
         workbook (openpyxl.Workbook): The workbook to add question tabs to.
     """
-    try:
-        logging.info("Starting question cutting processor...")
+    logging.info("Starting question cutting processor...")
 
-        # Create Q1-Q10 tabs
-        create_question_tabs(workbook)
+    # Create Q1-Q10 tabs
+    create_question_tabs(workbook)
 
-        logging.info("Question cutting processor completed successfully")
-
-    except Exception as e:
-        logging.error(f"Error during question cutting processor: {e}")
-        raise
+    logging.info("Question cutting processor completed successfully")
 
 
+@log_errors("creating question tabs")
 def create_question_tabs(workbook: openpyxl.Workbook) -> None:
     """
     Creates Q1-Q10 tabs for question processing.
@@ -99,60 +107,61 @@ def create_question_tabs(workbook: openpyxl.Workbook) -> None:
     Args:
         workbook (openpyxl.Workbook): The workbook to add question tabs to.
     """
-    try:
-        logging.info("Creating Q1-Q10 tabs...")
+    logging.info("Creating Q1-Q10 tabs...")
+
+    # Title lookups for the whole run; kept in step with the removals and creations below
+    sheets_by_title = {ws.title: ws for ws in workbook.worksheets}
+
+    # Get the data map worksheet for column H lookups
+    if SHEET_DATA_MAP not in sheets_by_title:
+        logging.warning(f"No '{SHEET_DATA_MAP}' tab found, creating tabs without column H data")
+        data_map_ws = None
+        h_index = {}
+    else:
+        data_map_ws = sheets_by_title[SHEET_DATA_MAP]
+        # Column H text for every question, looked up once for all tabs
+        h_index = build_question_h_index(data_map_ws)
+
+    # Create Q1 through Q10 tabs
+    for i in range(1, 11):  # 1 to 10 inclusive
+        tab_name = f"Q{i}"
+
+        # Remove existing tab if it exists
+        if tab_name in sheets_by_title:
+            workbook.remove(sheets_by_title.pop(tab_name))
+            logging.info(f"Removed existing {tab_name} tab")
+
+        # Create new question tab
+        question_ws = workbook.create_sheet(title=tab_name)
+        sheets_by_title[tab_name] = question_ws
+
+        # Add the question number in cell A1
+        question_ws['A1'] = i
+
+        # Find corresponding data from column H in data map
+        if data_map_ws:
+            column_h_text = h_index.get(i)
+            if column_h_text:
+                question_ws['A2'] = column_h_text
+                logging.info(f"Added column H text to {tab_name} A2: {column_h_text}")
+
+                # Detect question type and apply appropriate setup
+                question_type = _QUESTION_TYPE_HANDLERS.get(column_h_text)
+                if question_type:
+                    handler, type_name = question_type
+                    handler(question_ws, i, workbook)
+                    logging.info(f"Applied {type_name} setup to {tab_name}")
 
-        # Get the data map worksheet for column H lookups
-        if SHEET_DATA_MAP not in [ws.title for ws in workbook.worksheets]:
-            logging.warning(f"No '{SHEET_DATA_MAP}' tab found, creating tabs without column H data")
-            data_map_ws = None
-        else:
-            data_map_ws = workbook[SHEET_DATA_MAP]
-
-        # Create Q1 through Q10 tabs
-        for i in range(1, 11):  # 1 to 10 inclusive
-            tab_name = f"Q{i}"
-
-            # Remove existing tab if it exists
-            if tab_name in [ws.title for ws in workbook.worksheets]:
-                workbook.remove(workbook[tab_name])
-                logging.info(f"Removed existing {tab_name} tab")
-
-            # Create new question tab
-            question_ws = workbook.create_sheet(title=tab_name)
-
-            # Add the question number in cell A1
-            question_ws['A1'] = i
-
-            # Find corresponding data from column H in data map
-            if data_map_ws:
-                column_h_text = find_question_column_h_text(data_map_ws, i)
-                if column_h_text:
-                    question_ws['A2'] = column_h_text
-                    logging.info(f"Added column H text to {tab_name} A2: {column_h_text}")
-
-                    # Detect question type and apply appropriate setup
-                    if column_h_text == "0, 0, 0, Simple Select, , 0, 0, 0, 0, Other Specify Parent":
-                        cut_single_select_with_other(question_ws, i, workbook)
-                        logging.info(f"Applied single select with other setup to {tab_name}")
-                    elif column_h_text == "0, 0, 0, Simple Select, , 0, 0, 0, 0, 0":
-                        cut_single_select(question_ws, i, workbook)
-                        logging.info(f"Applied single select setup to {tab_name}")
-
-                else:
-                    question_ws['A2'] = f"No data found for question {i}"
-                    logging.info(f"No column H data found for question {i}")
             else:
-                question_ws['A2'] = f"Data map not available"
-
+                question_ws['A2'] = f"No data found for question {i}"
+                logging.info(f"No column H data found for question {i}")
+        else:
+            question_ws['A2'] = f"Data map not available"
 
-            logging.info(f"Created {tab_name} tab")
 
-        logging.info("Successfully created all Q1-Q10 tabs")
+        logging.info(f"Created {tab_name} tab")
 
-    except Exception as e:
-        logging.error(f"Error creating question tabs: {e}")
-        raise
+    logging.info("Successfully created all Q1-Q10 tabs")
 
 
 def process_excel_file(input_path: str, output_path: str) -> None:
@@ -170,6 +179,9 @@ def process_excel_file(input_path: str, output_path: str) -> None:
     try:
         logging.info(f"Starting processing of {input_path}")
 
+        # Drop data map lookups cached for any previously processed workbook
+        clear_data_map_cache()
+
         # Load the raw Excel file
         workbook = load_raw_excel_file(input_path)
 
@@ -185,26 +197,31 @@ def process_excel_file(input_path: str, output_path: str) -> None:
         # Perform column question map initial setup
         column_question_map_initial_setup(workbook)
 
-        # Save intermediate workbook with formulas (for debugging)
-        base_path = Path(output_path)
-        # Extract version number from output filename to keep consistent naming
-        stem = base_path.stem
-        if 'v' in stem:
-            version_part = stem[stem.rfind('v'):]  # Gets 'v58' part
-            formula_output_path = base_path.parent / f"test_processed_pilot{version_part}_formulas{base_path.suffix}"
-        else:
-            formula_output_path = base_path.parent / f"{stem}_formulas{base_path.suffix}"
-        save_processed_excel(workbook, str(formula_output_path))
-        logging.info(f"Saved intermediate workbook with formulas: {formula_output_path}")
-
         # Save workbook before Excel calculation
         save_processed_excel(workbook, output_path)
 
-        # Calculate all formulas using Excel
-        calculate_excel_formulas(output_path)
+        # Keep a copy of the workbook with formulas for debugging; copying the saved file avoids a second serialization
+        if logging.getLogger().isEnabledFor(logging.DEBUG):
+            base_path = Path(output_path)
+            # Extract version number from output filename to keep consistent naming
+            stem = base_path.stem
+            if 'v' in stem:
+                version_part = stem[stem.rfind('v'):]  # Gets 'v58' part
+                formula_output_path = base_path.parent / f"test_processed_pilot{version_part}_formulas{base_path.suffix}"
+            else:
+                formula_output_path = base_path.parent / f"{stem}_formulas{base_path.suffix}"
+            shutil.copyfile(output_path, formula_output_path)
+            logging.info(f"Saved intermediate workbook with formulas: {formula_output_path}")
 
-        # Reload workbook after Excel calculation with data_only=True to get calculated values
-        workbook = openpyxl.load_workbook(output_path, data_only=True)
+        # Calculate all formulas using Excel
+        if calculate_excel_formulas(output_path):
+            # Reload workbook after Excel calculation with data_only=True to get calculated values.
+            # Formulas are replaced by their values, so external link tables are no longer needed.
+            workbook = openpyxl.load_workbook(output_path, data_only=True, keep_links=False)
+        else:
+            # Nothing was calculated, so a data_only reload would only replace every formula with None.
+            # Keep working on the in-memory workbook instead.
+            logging.warning("Excel calculation did not run - continuing with the uncalculated workbook")
 
         # Perform question cutting
         question_cutting_processor(workbook)
@@ -214,6 +231,53 @@ def process_excel_file(input_path: str, output_path: str) -> None:
 
         logging.info(f"Successfully processed {input_path} -> {output_path}")
 
-    except Exception as e:
+    except (OSError, ValueError) as e:
         logging.error(f"Error processing Excel file {input_path}: {e}")
         raise
+
+
+def _init_worker_logging(level: int) -> None:
+    """Configures logging in a worker process to match the parent's level."""
+    logging.basicConfig(level=level, format=LOG_FORMAT)
+
+
+def process_excel_files(jobs: List[Tuple[str, str]], max_workers: Optional[int] = None) -> List[Optional[Exception]]:
+    """
+    Processes several Excel files in parallel, one worker process per file.
+
+    Each file goes through process_excel_file on its own, so a failure in one file does not
+    stop the others.
+
+    Args:
+        jobs (list): (input_path, output_path) pairs to process
+        max_workers (int): Number of worker processes (defaults to one per CPU, at most one per file)
+
+    Returns:
+        list: For each job in order, None if it succeeded or the exception it raised
+    """
+    results: List[Optional[Exception]] = [None] * len(jobs)
+    if not jobs:
+        return results
+
+    if max_workers is None:
+        max_workers = min(len(jobs), os.cpu_count() or 1)
+    logging.info(f"Processing {len(jobs)} files with {max_workers} worker processes")
+
+    with ProcessPoolExecutor(max_workers=max_workers, initializer=_init_worker_logging,
+                             initargs=(logging.getLogger().getEffectiveLevel(),)) as executor:
+        futures = {
+            executor.submit(process_excel_file, input_path, output_path): index
+            for index, (input_path, output_path) in enumerate(jobs)
+        }
+        for future in as_completed(futures):
+            index = futures[future]
+            try:
+                future.result()
+            except (OSError, ValueError) as e:
+                # Already logged by process_excel_file in the worker
+                results[index] = e
+            except Exception as e:
+                logging.error(f"Error processing Excel file {jobs[index][0]}: {e}")
+                results[index] = e
+
+    return results
@@ -5,14 +5,12 @@ This module handles the setup and formatting of standard single select questions
 """
 
 import logging
-import re
 from copy import copy
 
 import openpyxl
-from openpyxl.styles import Font
-from openpyxl.utils import get_column_letter, column_index_from_string
 
-from ..constants import SHEET_DATA_MAP
+from ..constants import COL_WIDTH_MEDIUM, SHEET_DATA_MAP
+from ..formatters.styles import BLUE_FONT, CENTER_ALIGN
 from ..formatters.worksheet import (
     setup_question_basic_formatting,
     add_question_text_and_section_header,
@@ -20,6 +18,7 @@ from ..formatters.worksheet import (
     apply_center_alignment_to_columns,
     add_cross_cut_section,
 )
+from ..utils.worksheet_utils import FILTER_HEADER_TEMPLATE, FILTER_Q_TEMPLATE, shift_column_refs
 from ..data_extractors.data_map_extractor import extract_response_options
 
 
@@ -48,17 +47,18 @@ def cut_single_select(question_ws: openpyxl.worksheet.worksheet.Worksheet, quest
         # Add headers to row 4 (excluding Q4)
         add_row4_headers(question_ws, include_q_header=False)
 
+        terminator_row = None
         # Extract and place response options (no Other Specify Child functionality)
-        if workbook and SHEET_DATA_MAP in [ws.title for ws in workbook.worksheets]:
+        if workbook and SHEET_DATA_MAP in workbook.sheetnames:
             data_map_ws = workbook[SHEET_DATA_MAP]
-            extract_response_options(data_map_ws, question_ws, question_number)
+            terminator_row = extract_response_options(data_map_ws, question_ws, question_number)
 
         # Apply center alignment to specified columns (excluding Q)
-        apply_center_alignment_to_columns(question_ws, include_q_column=False)
+        apply_center_alignment_to_columns(question_ws, include_q_column=False, max_row=terminator_row)
 
         # Add additional analysis section (Cross Cut)
         # Use cross_cut_row as the anchor for all Cross Cut section positioning
-        cross_cut_row = add_cross_cut_section(question_ws)
+        cross_cut_row = add_cross_cut_section(question_ws, terminator_row)
 
         # Add filter labels using offsets from cross_cut_row
         question_ws.cell(row=cross_cut_row + 2, column=3, value='Filter Q #1')  # Column C = 3
@@ -70,12 +70,11 @@ def cut_single_select(question_ws: openpyxl.worksheet.worksheet.Worksheet, quest
         logging.info(f"Added filter labels in column C from row {cross_cut_row + 2} to {cross_cut_row + 7}")
 
         # Add filter values in column D with blue font
-        blue_font = Font(color="0000FF")
         # Row +2 and +5 left empty for Filter Q rows (formulas will be added later)
-        question_ws.cell(row=cross_cut_row + 3, column=4, value='record').font = blue_font  # Column D = 4
-        question_ws.cell(row=cross_cut_row + 4, column=4, value='<>').font = blue_font
-        question_ws.cell(row=cross_cut_row + 6, column=4, value='record').font = blue_font
-        question_ws.cell(row=cross_cut_row + 7, column=4, value='<>').font = blue_font
+        question_ws.cell(row=cross_cut_row + 3, column=4, value='record').font = BLUE_FONT  # Column D = 4
+        question_ws.cell(row=cross_cut_row + 4, column=4, value='<>').font = BLUE_FONT
+        question_ws.cell(row=cross_cut_row + 6, column=4, value='record').font = BLUE_FONT
+        question_ws.cell(row=cross_cut_row + 7, column=4, value='<>').font = BLUE_FONT
         logging.info(f"Added filter values (record/<>) in column D at rows {cross_cut_row + 3}, {cross_cut_row + 4}, {cross_cut_row + 6}, {cross_cut_row + 7} with blue font")
 
         # Add HumRead Filter labels in column C (same rows as OFFSET formulas in columns D-N)
@@ -101,127 +100,103 @@ def cut_single_select(question_ws: openpyxl.worksheet.worksheet.Worksheet, quest
         filter_2_row = cross_cut_row + 7  # Row with "Filter #2"
 
         # Add Filter Q formulas to lookup English question text from data map
-        filter_q_1_formula = f'=IF(D${filter_col_1_row}="record", "No filter", OFFSET(\'data map\'!$C$2, MATCH(D${filter_col_1_row}, \'data map\'!$L$2:$L$3200, 0)-1, 0))'
+        filter_q_1_formula = FILTER_Q_TEMPLATE.format(filter_col_row=filter_col_1_row)
         question_ws.cell(row=filter_q_1_row, column=4, value=filter_q_1_formula)  # Column D = 4
         logging.info(f"Added Filter Q #1 OFFSET formula in D{filter_q_1_row} referencing D${filter_col_1_row}")
 
-        filter_q_2_formula = f'=IF(D${filter_col_2_row}="record", "No filter", OFFSET(\'data map\'!$C$2, MATCH(D${filter_col_2_row}, \'data map\'!$L$2:$L$3200, 0)-1, 0))'
+        filter_q_2_formula = FILTER_Q_TEMPLATE.format(filter_col_row=filter_col_2_row)
         question_ws.cell(row=filter_q_2_row, column=4, value=filter_q_2_formula)  # Column D = 4
         logging.info(f"Added Filter Q #2 OFFSET formula in D{filter_q_2_row} referencing D${filter_col_2_row}")
 
         # First header row - Filter #1
-        first_header_formula = f'=IF(D${filter_1_row}="<>", "No filter", OFFSET(\'data map\'!$E$2, MATCH(D${filter_col_1_row}, \'data map\'!$L$2:$L$3200, 0)+D${filter_1_row},0))'
+        first_header_formula = FILTER_HEADER_TEMPLATE.format(filter_col_row=filter_col_1_row, filter_row=filter_1_row)
         question_ws.cell(row=first_header_row, column=4, value=first_header_formula)  # Column D = 4
         logging.info(f"Added first OFFSET formula in D{first_header_row} with flexible row references (D${filter_col_1_row} and D${filter_1_row})")
 
         # Second header row - Filter #2
-        second_header_formula = f'=IF(D${filter_2_row}="<>", "No filter", OFFSET(\'data map\'!$E$2, MATCH(D${filter_col_2_row}, \'data map\'!$L$2:$L$3200, 0)+D${filter_2_row},0))'
+        second_header_formula = FILTER_HEADER_TEMPLATE.format(filter_col_row=filter_col_2_row, filter_row=filter_2_row)
         question_ws.cell(row=second_header_row, column=4, value=second_header_formula)  # Column D = 4
         logging.info(f"Added second OFFSET formula in D{second_header_row} with flexible row references (D${filter_col_2_row} and D${filter_2_row})")
 
+        # COUNTIFS template with the filter rows filled in; {row} is the response option row in column G
+        countifs_template = f"=COUNTIFS(OFFSET('raw data'!$C$3:$C$502, 0, MATCH($G$4, 'raw data'!$C$2:$AJC$2, 0)-1), $G{{row}}, OFFSET('raw data'!$C$3:$C$502, 0, MATCH(D${filter_col_1_row}, 'raw data'!$C$2:$AJC$2, 0)-1), D${filter_1_row}, OFFSET('raw data'!$C$3:$C$502, 0, MATCH(D${filter_col_2_row}, 'raw data'!$C$2:$AJC$2, 0)-1), D${filter_2_row})"
+
         # Add COUNTIFS formula in the cell below (same row as =C6)
-        countifs_formula = f"=COUNTIFS(OFFSET('raw data'!$C$3:$C$502, 0, MATCH($G$4, 'raw data'!$C$2:$AJC$2, 0)-1), $G6, OFFSET('raw data'!$C$3:$C$502, 0, MATCH(D${filter_col_1_row}, 'raw data'!$C$2:$AJC$2, 0)-1), D${filter_1_row}, OFFSET('raw data'!$C$3:$C$502, 0, MATCH(D${filter_col_2_row}, 'raw data'!$C$2:$AJC$2, 0)-1), D${filter_2_row})"
-        question_ws.cell(row=formula_row, column=4, value=countifs_formula)  # Column D = 4
+        question_ws.cell(row=formula_row, column=4, value=countifs_template.format(row=6))  # Column D = 4
         logging.info(f"Added COUNTIFS formula in D{formula_row} with flexible row references")
 
         # Count the number of response options (from row 6 to the row with "<>" in column C)
-        response_option_count = 0
-        for row in range(6, question_ws.max_row + 1):
-            cell_value = question_ws.cell(row=row, column=3).value  # Column C = 3
-            if cell_value is not None and str(cell_value).strip():
-                response_option_count += 1
-                # Stop counting after we hit "<>"
-                if str(cell_value).strip() == "<>":
-                    break
+        if terminator_row is not None:
+            # Known from extract_response_options: rows 6 through the "<>" row
+            response_option_count = terminator_row - 5
+        else:
+            response_option_count = 0
+            # Column C = 3; values_only yields plain tuples rather than Cell objects.
+            # formula_row is the lowest row written so far, so it bounds the scan without computing max_row.
+            for (cell_value,) in question_ws.iter_rows(min_row=6, max_row=formula_row, min_col=3, max_col=3, values_only=True):
+                if cell_value is not None and str(cell_value).strip():
+                    response_option_count += 1
+                    # Stop counting after we hit "<>"
+                    if str(cell_value).strip() == "<>":
+                        break
 
         # Drag down the formula =C6 and COUNTIFS formula for the number of response options
         if response_option_count > 0:
-            for i in range(response_option_count):
-                current_formula_row = formula_row + i
-                # Calculate the reference row (6 + i for C6, C7, C8, etc.)
-                reference_row = 6 + i
-                question_ws.cell(row=current_formula_row, column=3, value=f'=C{reference_row}')
+            end_drag_row = formula_row + response_option_count - 1  # End at the last response option row
+
+            # The COUNTIFS template dragged across to E:N, shifted once per column instead of once per cell
+            shifted_countifs_templates = [shift_column_refs(countifs_template, col_offset) for col_offset in range(1, 11)]
 
+            # Write each response option row across C:N in one pass: =C ref in C, COUNTIFS in D, shifted copies in E:N
+            for reference_row, (c_cell, d_cell, *target_cells) in enumerate(
+                    question_ws.iter_rows(min_row=formula_row, max_row=end_drag_row, min_col=3, max_col=14), start=6):
+                # Reference row is 6 + i for C6, C7, C8, etc.
+                c_cell.value = f'=C{reference_row}'
                 # Drag down COUNTIFS formula in column D, adjusting $G6 reference
-                countifs_formula_dragged = f"=COUNTIFS(OFFSET('raw data'!$C$3:$C$502, 0, MATCH($G$4, 'raw data'!$C$2:$AJC$2, 0)-1), $G{reference_row}, OFFSET('raw data'!$C$3:$C$502, 0, MATCH(D${filter_col_1_row}, 'raw data'!$C$2:$AJC$2, 0)-1), D${filter_1_row}, OFFSET('raw data'!$C$3:$C$502, 0, MATCH(D${filter_col_2_row}, 'raw data'!$C$2:$AJC$2, 0)-1), D${filter_2_row})"
-                question_ws.cell(row=current_formula_row, column=4, value=countifs_formula_dragged)
+                d_cell.value = countifs_template.format(row=reference_row)
+                for target_cell, shifted_template in zip(target_cells, shifted_countifs_templates):
+                    target_cell.value = shifted_template.format(row=reference_row)
 
-            logging.info(f"Dragged down formulas from row {formula_row} to {formula_row + response_option_count - 1} ({response_option_count} rows)")
+            logging.info(f"Dragged down formulas from row {formula_row} to {end_drag_row} ({response_option_count} rows)")
             logging.info(f"Column C contains =C6 through =C{reference_row}, Column D contains COUNTIFS formulas")
 
-            # Drag column D over to columns E through N for the entire new section
-            # This includes Filter Column #1 through Filter #2 rows, OFFSET formula row, and all COUNTIFS formula rows
-            start_drag_row = cross_cut_row + 2  # Start from "Filter Column #1" row
-            end_drag_row = formula_row + response_option_count - 1  # End at the last response option row
+            # Drag column D over to columns E through N for the filter rows above the formula rows
+            # This includes Filter Q #1 through Filter #2 rows and both OFFSET formula rows
+            start_drag_row = cross_cut_row + 2  # Start from "Filter Q #1" row
 
-            for row_num in range(start_drag_row, end_drag_row + 1):
-                source_cell = question_ws.cell(row=row_num, column=4)  # Column D = 4
+            # Walk D:N once per row; the first cell of each row tuple is the column D source
+            for source_cell, *target_cells in question_ws.iter_rows(min_row=start_drag_row, max_row=formula_row - 1, min_col=4, max_col=14):
                 source_value = source_cell.value
+                is_formula = bool(source_value) and isinstance(source_value, str) and source_value.startswith('=')
+                # One font copy per source row, shared by all ten targets
+                source_font = copy(source_cell.font) if source_cell.font else None
 
-                # Copy from D to E through N (columns 5 through 14)
-                for col_num in range(5, 15):  # E=5 through N=14
-                    if source_value and isinstance(source_value, str) and source_value.startswith('='):
-                        # This is a formula - adjust column references
-                        adjusted_formula = source_value
-
-                        # Calculate column offset (E is +1 from D, F is +2, etc.)
-                        col_offset = col_num - 4  # D=4, so E=5 means offset of 1
-
+                # Copy from D to E through N (offsets 1 through 10)
+                for col_offset, target_cell in enumerate(target_cells, start=1):
+                    if is_formula:
                         # Replace column references like D$16, D$17, D$18, D$19 with adjusted columns
                         # But NOT absolute references like $G$4 (dollar before column)
-                        # Pattern matches: letter (NOT preceded by $) + $ + digits (e.g., D$16 but not $G$4)
-                        def adjust_col_ref(match):
-                            col_letter = match.group(1)
-                            dollar = match.group(2)
-                            row_ref = match.group(3)
-
-                            # Convert column letter to number, add offset, convert back
-                            col_num_orig = column_index_from_string(col_letter)
-                            new_col_num = col_num_orig + col_offset
-                            new_col_letter = get_column_letter(new_col_num)
-
-                            return f"{new_col_letter}{dollar}{row_ref}"
-
-                        # Pattern to match column references like D$16 but NOT $G$4
-                        # Negative lookbehind (?<!\$) ensures no $ before the column letter
-                        adjusted_formula = re.sub(r'(?<!\$)([A-Z]+)(\$)(\d+)', adjust_col_ref, adjusted_formula)
-
-                        target_cell = question_ws.cell(row=row_num, column=col_num)
-                        target_cell.value = adjusted_formula
-                        # Copy font from source cell
-                        if source_cell.font:
-                            target_cell.font = copy(source_cell.font)
+                        target_cell.value = shift_column_refs(source_value, col_offset)
                     else:
                         # Not a formula, just copy the value
-                        target_cell = question_ws.cell(row=row_num, column=col_num)
                         target_cell.value = source_value
-                        # Copy font from source cell
-                        if source_cell.font:
-                            target_cell.font = copy(source_cell.font)
+                    # Copy font from source cell
+                    if source_font:
+                        target_cell.font = source_font
 
             logging.info(f"Dragged column D (including filter values and formulas) over to columns E:N from row {start_drag_row} to {end_drag_row} with adjusted column references")
 
         # Ensure column widths and alignment are set correctly at the end (after all operations)
-        question_ws.column_dimensions['D'].width = 16
-        question_ws.column_dimensions['E'].width = 16
-        question_ws.column_dimensions['F'].width = 16
-        question_ws.column_dimensions['G'].width = 16
-        question_ws.column_dimensions['H'].width = 16
-        question_ws.column_dimensions['I'].width = 16
-        question_ws.column_dimensions['J'].width = 16
-        question_ws.column_dimensions['K'].width = 16
-        question_ws.column_dimensions['L'].width = 16
-        question_ws.column_dimensions['M'].width = 16
-        question_ws.column_dimensions['N'].width = 16
+        column_dimensions = question_ws.column_dimensions
+        for col_letter in 'DEFGHIJKLMN':
+            column_dimensions[col_letter].width = COL_WIDTH_MEDIUM
         logging.info(f"Set column widths D:N (including F and H) to 16")
 
-        # Apply center alignment to columns D:N for all rows
-        center_alignment_final = openpyxl.styles.Alignment(horizontal='center')
-        for col_letter in ['D', 'E', 'F', 'G', 'H', 'I', 'J', 'K', 'L', 'M', 'N']:
-            for row in question_ws.iter_rows(min_col=openpyxl.utils.column_index_from_string(col_letter),
-                                           max_col=openpyxl.utils.column_index_from_string(col_letter)):
-                for cell in row:
-                    cell.alignment = center_alignment_final
+        # Apply center alignment to columns D:N for all rows, down to the last formula row written above
+        last_written_row = formula_row + max(response_option_count, 1) - 1
+        for row in question_ws.iter_rows(min_row=1, max_row=last_written_row, min_col=4, max_col=14):
+            for cell in row:
+                cell.alignment = CENTER_ALIGN
         logging.info(f"Applied center alignment to columns D:N (including F and H)")
 
         logging.info(f"Successfully set up single select for question {question_number}")
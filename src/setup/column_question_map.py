@@ -2,10 +2,17 @@
 Column question map worksheet setup.
 
 This module handles initial setup and configuration of the column question map tab.
+
+Performance note: this setup is bound by openpyxl creating and styling Cell objects, not by
+computation. ws.cell() creates a cell on every call for a missing coordinate, so loops over more
+than a few hundred cells write through iter_rows, ws.append or fill_formulas_down instead, and
+stop at the last row that holds content.
 """
 
 import logging
 import re
+from itertools import zip_longest
+from typing import Optional
 
 import openpyxl
 from openpyxl.styles import Alignment
@@ -17,6 +24,36 @@ from ..constants import (
     COL_WIDTH_WIDE,
 )
 from ..formatters.styles import create_thin_border, create_pale_blue_fill
+from ..utils.worksheet_utils import find_last_row_with_text, fill_formulas_down
+
+# Question marker of a survey column header, as the E3 formula derives it: the text before the
+# first "_", else before the first "none", else before the first "r", else the whole header.
+# The alternatives are tried in that order, so "_" wins even when an "r" comes earlier.
+_QUESTION_MARKER_RE = re.compile(r'([^_]*)_|(.*?)none|(.*?)r|(.*)', re.DOTALL)
+
+
+def _question_marker(header_value) -> Optional[str]:
+    """
+    Simulates the column E formula for one column header.
+
+    Args:
+        header_value: Value of the column header in column C
+
+    Returns:
+        str: The question marker for a survey column, or None for system columns and blank headers
+    """
+    if header_value is None:
+        return None
+
+    header_str = str(header_value).strip()
+
+    # Check if first character is a letter and uppercase (Survey vs System)
+    if not header_str or not (header_str[0].isalpha() and header_str[0].isupper()):
+        return None
+
+    # This would be "Survey" - extract question marker with the same logic as E3 formula
+    marker_match = _QUESTION_MARKER_RE.match(header_str)
+    return marker_match.group(marker_match.lastindex)
 
 
 def column_question_map_initial_setup(workbook: openpyxl.Workbook) -> None:
@@ -30,7 +67,7 @@ def column_question_map_initial_setup(workbook: openpyxl.Workbook) -> None:
         logging.info("Starting column question map initial setup...")
 
         # Get the column question map worksheet
-        if SHEET_COLUMN_QUESTION_MAP not in [ws.title for ws in workbook.worksheets]:
+        if SHEET_COLUMN_QUESTION_MAP not in workbook.sheetnames:
             logging.warning(f"No '{SHEET_COLUMN_QUESTION_MAP}' tab found, skipping column question map setup")
             return
 
@@ -72,42 +109,54 @@ def column_question_map_initial_setup(workbook: openpyxl.Workbook) -> None:
         thin_border = create_thin_border()
         center_alignment = Alignment(horizontal='center', vertical='center')
 
-        headers_formatted = 0
-        for col in range(1, ws.max_column + 1):
+        # Only the header cells written above (C2:H2) have content
+        for col in range(3, 3 + len(headers)):
             cell = ws.cell(row=2, column=col)
-            if cell.value is not None:  # Only format cells with content
-                cell.border = thin_border
-                cell.fill = pale_blue_fill
-                cell.alignment = center_alignment
-                headers_formatted += 1
+            cell.border = thin_border
+            cell.fill = pale_blue_fill
+            cell.alignment = center_alignment
 
-        logging.info(f"Formatted {headers_formatted} column headers in row 2 with borders, pale blue background, and center alignment")
+        logging.info(f"Formatted {len(headers)} column headers in row 2 with borders, pale blue background, and center alignment")
 
         # Copy column headers from raw data tab and transpose to column B
-        if SHEET_RAW_DATA in [ws_temp.title for ws_temp in workbook.worksheets]:
+        transposed_headers = []
+        if SHEET_RAW_DATA in workbook.sheetnames:
             raw_data_ws = workbook[SHEET_RAW_DATA]
 
+            # Read row 2 of raw data once
+            raw_header_values = next(raw_data_ws.iter_rows(min_row=2, max_row=2, values_only=True), ())
+
             # Find the last column with text in row 2 of raw data
             last_col_with_text = 1
-            for col in range(1, raw_data_ws.max_column + 1):
-                if raw_data_ws.cell(row=2, column=col).value is not None and str(raw_data_ws.cell(row=2, column=col).value).strip():
+            for col in range(len(raw_header_values), 0, -1):
+                header_value = raw_header_values[col - 1]
+                if header_value is not None and str(header_value).strip():
                     last_col_with_text = col
+                    break
 
-            # Copy headers from C2 onwards in raw data tab
-            headers_copied = 0
-            current_row = 3  # Start at C3 in column question map
+            # Collect headers from C2 onwards in raw data tab; they are pasted as values (transposed) below
+            transposed_headers = [value for value in raw_header_values[2:last_col_with_text] if value is not None]
+        else:
+            logging.warning("Raw data tab not found, skipping header copying")
 
-            for col in range(3, last_col_with_text + 1):  # Start from C2 (column 3)
-                header_value = raw_data_ws.cell(row=2, column=col).value
+        # Write the transposed headers (column C, C3 onwards) together with the sequential
+        # numbers 1-200 (column H, H3=1, H4=2, etc.) as whole rows starting at row 3
+        column_rows = list(zip_longest(transposed_headers, range(1, 201)))
+        if ws.max_row <= 2:
+            # Nothing below the header row yet (the tab is normally created blank), so the rows can be appended
+            for header_value, number in column_rows:
+                ws.append((None, None, header_value, None, None, None, None, number))
+        else:
+            for (header_cell, *_, number_cell), (header_value, number) in zip(
+                    ws.iter_rows(min_row=3, max_row=len(column_rows) + 2, min_col=3, max_col=8), column_rows):
                 if header_value is not None:
-                    # Paste as value (transposed) into column C of column question map
-                    ws.cell(row=current_row, column=3, value=header_value)  # Column C = 3
-                    headers_copied += 1
-                    current_row += 1
+                    header_cell.value = header_value
+                if number is not None:
+                    number_cell.value = number
 
-            logging.info(f"Copied and transposed {headers_copied} column headers from raw data tab to column C (C3 onwards)")
-        else:
-            logging.warning("Raw data tab not found, skipping header copying")
+        if SHEET_RAW_DATA in workbook.sheetnames:
+            logging.info(f"Copied and transposed {len(transposed_headers)} column headers from raw data tab to column C (C3 onwards)")
+        logging.info("Added sequential numbers 1-200 in column H starting at H3")
 
         # Add formulas starting in row 3
         # D3 formula
@@ -118,46 +167,13 @@ def column_question_map_initial_setup(workbook: openpyxl.Workbook) -> None:
         ws['F3'] = '=IFERROR(INDEX($H$3:$H$200, MATCH($E3, $G$3:$G$200, 0)), "System")'
         logging.info("Added formulas to D3, E3, and F3")
 
-        # Fill column H with sequential numbers 1-200 starting from H3
-        for i in range(1, 201):  # 1 to 200
-            row_num = i + 2  # H3 starts at row 3, so H3=1, H4=2, etc.
-            ws.cell(row=row_num, column=8, value=i)  # Column H = 8
-
-        logging.info("Added sequential numbers 1-200 in column H starting at H3")
-
         # Copy formulas D3:G3 down to the last row with text in column C
         # Find the last row with text in column C
-        last_row_with_text = 1
-        for row in range(1, ws.max_row + 1):
-            if ws.cell(row=row, column=3).value is not None and str(ws.cell(row=row, column=3).value).strip():
-                last_row_with_text = row
+        last_row_with_text = find_last_row_with_text(ws, column=3)
 
         if last_row_with_text > 3:  # Only copy if there are rows below row 3
-            # Copy formulas from D3:G3 down to the last row with text
-            for row in range(4, last_row_with_text + 1):  # Start from row 4 (next row after formulas)
-                for col in range(4, 8):  # D=4, E=5, F=6, G=7
-                    source_cell = ws.cell(row=3, column=col)
-                    target_cell = ws.cell(row=row, column=col)
-
-                    # Copy the formula, adjusting relative references
-                    if source_cell.value and isinstance(source_cell.value, str) and source_cell.value.startswith('='):
-                        # Manually adjust relative row references in the formula
-                        formula = source_cell.value
-                        row_offset = row - 3
-
-                        # Replace relative row references (e.g., C3 -> C4, C5, etc.)
-                        def replace_row_ref(match):
-                            col_ref = match.group(1)
-                            row_ref = int(match.group(2))
-                            # Only adjust relative references (not absolute ones with $)
-                            if '$' not in match.group(0):
-                                new_row = row_ref + row_offset
-                                return f"{col_ref}{new_row}"
-                            return match.group(0)
-
-                        # Pattern to match column+row references (e.g., C3, D3, etc.)
-                        adjusted_formula = re.sub(r'([A-Z]+)(\d+)', replace_row_ref, formula)
-                        target_cell.value = adjusted_formula
+            # Copy formulas from D3:G3 down to the last row with text, adjusting relative row references
+            fill_formulas_down(ws, source_row=3, min_col=4, max_col=7, last_row=last_row_with_text)
 
             copied_rows = last_row_with_text - 3
             logging.info(f"Copied formulas from D3:G3 down to row {last_row_with_text} ({copied_rows} additional rows)")
@@ -168,39 +184,9 @@ def column_question_map_initial_setup(workbook: openpyxl.Workbook) -> None:
 
         # After formulas are copied, simulate the E column results to populate G with unique values
         # Since we can't evaluate Excel formulas in openpyxl, we'll simulate the E3 formula logic
-        unique_values = []  # Use list to preserve order
-        seen_values = set()  # Track what we've seen to avoid duplicates
-
-        # Process each column header to simulate what column E formulas would produce
-        for row in range(3, last_row_with_text + 1):
-            # Get the column header from column C
-            header_value = ws.cell(row=row, column=3).value  # Column C = 3
-            if header_value is not None:
-                header_str = str(header_value).strip()
-
-                # Simulate the E3 formula logic: question marker extraction
-                # Check if first character is a letter and uppercase (Survey vs System)
-                if header_str and len(header_str) > 0:
-                    first_char = header_str[0]
-                    if first_char.isalpha() and first_char.isupper():
-                        # This would be "Survey" - extract question marker
-                        question_marker = header_str
-
-                        # Apply the same logic as E3 formula
-                        if "_" in question_marker:
-                            question_marker = question_marker[:question_marker.find("_")]
-                        elif "none" in question_marker:
-                            question_marker = question_marker[:question_marker.find("none")]
-                        elif "r" in question_marker:
-                            question_marker = question_marker[:question_marker.find("r")]
-
-                        # Add to unique list if not "System", not empty, and not already seen
-                        if question_marker and question_marker != "System" and question_marker not in seen_values:
-                            unique_values.append(question_marker)
-                            seen_values.add(question_marker)
-
-        # unique_values list now maintains the order from column E
-        unique_list = unique_values
+        # for each column header; dict.fromkeys drops repeated markers while keeping the order from column E
+        column_c_values = (value for (value,) in ws.iter_rows(min_row=3, max_row=last_row_with_text, min_col=3, max_col=3, values_only=True))
+        unique_list = [marker for marker in dict.fromkeys(map(_question_marker, column_c_values)) if marker and marker != "System"]
 
         # Populate column G starting at G3 with unique values
         for i, unique_value in enumerate(unique_list):
@@ -209,15 +195,18 @@ def column_question_map_initial_setup(workbook: openpyxl.Workbook) -> None:
 
         logging.info(f"Populated column G with {len(unique_list)} unique question markers simulated from column C headers")
 
-        # Apply center alignment to columns F, G, and H
-        center_alignment = Alignment(horizontal='center', vertical='center')
+        # Apply center alignment (the header alignment) to columns F, G, H down to the last row with content
+        # (the question numbers in column H run to row 202, column C may run further)
+        last_content_row = max(last_row_with_text, 202)
+        for row_cells in ws.iter_rows(min_row=1, max_row=last_content_row, min_col=6, max_col=8):
+            for cell in row_cells:
+                cell.alignment = center_alignment
 
-        # Apply center alignment to all of columns F, G, H (broader range to ensure coverage)
-        for col in range(6, 9):  # Columns F=6, G=7, H=8
-            for row in range(1, 1000):  # Apply to a large range to ensure all cells are covered
-                ws.cell(row=row, column=col).alignment = center_alignment
+        # Column-level style so rows below the content are centered without creating cells
+        for col_letter in ('F', 'G', 'H'):
+            ws.column_dimensions[col_letter].alignment = center_alignment
 
-        logging.info("Applied center alignment to entire columns F, G, and H")
+        logging.info(f"Applied center alignment to columns F, G, and H (cells through row {last_content_row}, column default below)")
 
         # Column G setup will be handled separately per user instructions
 
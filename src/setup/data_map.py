@@ -2,10 +2,13 @@
 Data map worksheet setup.
 
 This module handles initial setup and formula configuration of the data map tab.
+
+Performance note: most of the time here goes to the G:AG formula fill-down, one openpyxl Cell per
+formula per data map row. fill_formulas_down builds those cells in bulk; other loops are bounded
+by the last row with text in column C and should not call ws.cell() per cell.
 """
 
 import logging
-import re
 
 import openpyxl
 from openpyxl.styles import Alignment
@@ -18,6 +21,7 @@ from ..constants import (
     COL_WIDTH_EXTRA_WIDE,
 )
 from ..formatters.styles import create_thin_border, create_pale_blue_fill
+from ..utils.worksheet_utils import find_last_row_with_text, fill_formulas_down, shift_cells
 
 
 def data_map_initial_setup(workbook: openpyxl.Workbook) -> None:
@@ -36,7 +40,7 @@ def data_map_initial_setup(workbook: openpyxl.Workbook) -> None:
         logging.info("Starting data map initial setup...")
 
         # Get the data map worksheet
-        if SHEET_DATA_MAP not in [ws.title for ws in workbook.worksheets]:
+        if SHEET_DATA_MAP not in workbook.sheetnames:
             logging.warning(f"No '{SHEET_DATA_MAP}' tab found, skipping data map setup")
             return
 
@@ -46,9 +50,9 @@ def data_map_initial_setup(workbook: openpyxl.Workbook) -> None:
         ws.sheet_view.showGridLines = False
         logging.info("Removed gridlines from data map worksheet")
 
-        # Insert 2 columns at the front
-        ws.insert_cols(1, 2)
-        logging.info("Inserted 2 columns at the front")
+        # Insert 2 columns at the front and 3 rows at the top, moving every cell in one pass
+        shift_cells(ws, rows=3, cols=2)
+        logging.info("Inserted 2 columns at the front and 3 rows at the top")
 
         # Set width of the first 2 columns to 3
         ws.column_dimensions['A'].width = COL_WIDTH_NARROW
@@ -68,20 +72,19 @@ def data_map_initial_setup(workbook: openpyxl.Workbook) -> None:
         ws.column_dimensions['E'].width = COL_WIDTH_STANDARD
         logging.info(f"Set width of columns D:E to {COL_WIDTH_STANDARD}")
 
-        # Set width of columns G through Z to 13
-        for col_letter in ['G', 'H', 'I', 'J', 'K', 'L', 'M', 'N', 'O', 'P', 'Q', 'R', 'S', 'T', 'U', 'V', 'W', 'X', 'Y', 'Z']:
-            ws.column_dimensions[col_letter].width = COL_WIDTH_STANDARD
-        logging.info(f"Set width of columns G:Z to {COL_WIDTH_STANDARD}")
-
-        # Insert 3 rows at the top
-        ws.insert_rows(1, 3)
-        logging.info("Inserted 3 rows at the top")
+        # Set width of columns G through AG (every header column) to 13
+        column_dimensions = ws.column_dimensions
+        for col in range(7, 34):  # G=7 through AG=33
+            column_dimensions[get_column_letter(col)].width = COL_WIDTH_STANDARD
+        logging.info(f"Set width of columns G:AG to {COL_WIDTH_STANDARD}")
 
         # Add headers in row 2
-        ws['C2'] = "Question Info"
-        ws['D2'] = "System Response Option"
-        ws['E2'] = "Text Response Option"
-        ws['G2'] = "Question Number"
+        row2_headers = {
+            3: "Question Info",             # C
+            4: "System Response Option",    # D
+            5: "Text Response Option",      # E
+            7: "Question Number",           # G
+        }
 
         # Add additional headers from H to AG
         headers_h_to_ag = [
@@ -94,21 +97,27 @@ def data_map_initial_setup(workbook: openpyxl.Workbook) -> None:
             "Double Loop Flag #1", "Double Loop Flag #2", "Double Loop Flag #3"
         ]
 
-        # Start from column H (8) and add each header
-        for i, header in enumerate(headers_h_to_ag):
-            col_num = 8 + i  # H is column 8
-            if col_num <= 33:  # AG is column 33
-                ws.cell(row=2, column=col_num, value=header)
+        # Start from column H (8) and stop at column AG (33)
+        row2_headers.update(zip(range(8, 34), headers_h_to_ag))
+
+        for col_num, header in row2_headers.items():
+            ws.cell(row=2, column=col_num, value=header)
 
         logging.info("Added headers in row 2: Question Info, System Response Option, Text Response Option, Question Number, and additional headers H:AG")
 
         # Set text wrapping for column C and row 2
+        header_alignment = Alignment(wrap_text=True, horizontal='center', vertical='center')
+        column_c_alignment = Alignment(wrap_text=True, vertical='top')
+
         for row in ws.iter_rows(min_row=2, max_row=2):
             for cell in row:
-                cell.alignment = Alignment(wrap_text=True, horizontal='center', vertical='center')
+                cell.alignment = header_alignment
 
-        for cell in ws['C']:
-            cell.alignment = Alignment(wrap_text=True, vertical='top')
+        # Column C holds no text below the data map rows, so only its used range is wrapped
+        last_row_with_text = find_last_row_with_text(ws, column=3)
+        for (cell,) in ws.iter_rows(min_row=1, max_row=last_row_with_text, min_col=3, max_col=3):
+            cell.alignment = column_c_alignment
+        ws.column_dimensions['C'].alignment = column_c_alignment
 
         logging.info("Applied text wrapping to column C and row 2")
 
@@ -116,41 +125,34 @@ def data_map_initial_setup(workbook: openpyxl.Workbook) -> None:
         pale_blue_fill = create_pale_blue_fill()
         thin_border = create_thin_border()
 
-        headers_formatted = 0
-        for col in range(1, ws.max_column + 1):
+        # Row 2 is blank after the shift, so the headers written above (C2:E2, G2:AG2) are its only content
+        for col in row2_headers:
             cell = ws.cell(row=2, column=col)
-            if cell.value is not None:  # Only format cells with content
-                cell.border = thin_border
-                cell.fill = pale_blue_fill
-                # Preserve the wrap_text alignment that was set earlier
-                cell.alignment = Alignment(wrap_text=True, horizontal='center', vertical='center')
-                headers_formatted += 1
+            cell.border = thin_border
+            cell.fill = pale_blue_fill
+            # Preserve the wrap_text alignment that was set earlier
+            cell.alignment = header_alignment
 
-        logging.info(f"Formatted {headers_formatted} column headers in row 2 with borders, pale blue background, and center alignment")
+        logging.info(f"Formatted {len(row2_headers)} column headers in row 2 with borders, pale blue background, and center alignment")
 
         # Auto-fit row height for row 2 to accommodate wrapped text
         # Calculate the maximum lines needed based on text content and column width
         max_lines = 1
-        for col in range(1, ws.max_column + 1):
-            cell = ws.cell(row=2, column=col)
-            if cell.value is not None:
-                text = str(cell.value)
-                # Get column width (default to 13 if not set)
-                col_letter = get_column_letter(col)
-                col_width = ws.column_dimensions[col_letter].width or 13
+        for col, text in row2_headers.items():
+            # Get column width (default to 13 if not set); .get avoids creating a ColumnDimension for unset columns
+            dimension = column_dimensions.get(get_column_letter(col))
+            col_width = (dimension.width if dimension is not None else None) or 13
 
-                # Estimate characters per line based on column width
-                chars_per_line = max(1, int(col_width * 0.8))  # Rough estimate
-                lines_needed = max(1, len(text) // chars_per_line + (1 if len(text) % chars_per_line > 0 else 0))
+            # Estimate characters per line based on column width
+            chars_per_line = max(1, int(col_width * 0.8))  # Rough estimate
+            lines_needed = max(1, -(-len(text) // chars_per_line))  # Ceiling division
 
-                # Account for word wrapping (longer words need more lines)
-                words = text.split()
-                if words:
-                    longest_word = max(len(word) for word in words)
-                    if longest_word > chars_per_line:
-                        lines_needed = max(lines_needed, 2)
+            # Account for word wrapping (longer words need more lines)
+            longest_word = max(map(len, text.split()), default=0)
+            if longest_word > chars_per_line:
+                lines_needed = max(lines_needed, 2)
 
-                max_lines = max(max_lines, lines_needed)
+            max_lines = max(max_lines, lines_needed)
 
         # Set row height based on estimated lines (Excel default line height is about 15 points)
         estimated_height = max_lines * 15 + 5  # Add some padding
@@ -214,52 +216,12 @@ def data_map_initial_setup(workbook: openpyxl.Workbook) -> None:
         ws['AG4'] = '=IF(OR(ISNUMBER(SEARCH("0r",C4)),ISNUMBER(SEARCH("1r",C4)),ISNUMBER(SEARCH("2r",C4)),ISNUMBER(SEARCH("3r",C4)),ISNUMBER(SEARCH("4r",C4)),ISNUMBER(SEARCH("5r",C4)),ISNUMBER(SEARCH("6r",C4)),ISNUMBER(SEARCH("7r",C4)),ISNUMBER(SEARCH("8r",C4)),ISNUMBER(SEARCH("9r",C4))),1,0)'
         logging.info("Added formulas to G4 through AG4 (27 total formulas)")
 
-        # Find the last row with text in column C
-        last_row_with_text = 1
-        for row in range(1, ws.max_row + 1):
-            if ws.cell(row=row, column=3).value is not None and str(ws.cell(row=row, column=3).value).strip():
-                last_row_with_text = row
-
         # Copy formulas down to one row below the last row with text in column C
         target_last_row = last_row_with_text + 1
 
         if target_last_row > 4:  # Only copy if there are rows to copy to
-            # Copy formulas from G4:AG4 down to the target range (including G column)
-
-            # Define the source range (G4:AG4) - including G column
-            source_range = f"G4:AG4"
-            # Define the target range (G5:AG{target_last_row}) - including G column
-            target_range = f"G5:AG{target_last_row}"
-
-            # Get source cells
-            source_cells = ws[source_range]
-
-            # Copy formulas to each row
-            for row_idx, target_row in enumerate(range(5, target_last_row + 1)):
-                for col_idx, source_cell in enumerate(source_cells[0]):  # source_cells[0] since it's a single row
-                    target_cell = ws.cell(row=target_row, column=source_cell.column)
-
-                    if source_cell.value and isinstance(source_cell.value, str) and source_cell.value.startswith('='):
-                        # Copy the formula - openpyxl will automatically adjust relative references
-                        target_cell.value = source_cell.value
-
-                        # Manually adjust relative row references in the formula
-                        formula = source_cell.value
-                        row_offset = target_row - 4
-
-                        # Replace relative row references (e.g., C4 -> C5, C6, etc.)
-                        def replace_row_ref(match):
-                            col_ref = match.group(1)
-                            row_ref = int(match.group(2))
-                            # Only adjust relative references (not absolute ones with $)
-                            if '$' not in match.group(0):
-                                new_row = row_ref + row_offset
-                                return f"{col_ref}{new_row}"
-                            return match.group(0)
-
-                        # Pattern to match column+row references (e.g., C4, M4, etc.)
-                        adjusted_formula = re.sub(r'([A-Z]+)(\d+)', replace_row_ref, formula)
-                        target_cell.value = adjusted_formula
+            # Copy formulas from G4:AG4 down to the target range (including G column), adjusting relative row references
+            fill_formulas_down(ws, source_row=4, min_col=7, max_col=33, last_row=target_last_row)
 
             copied_rows = target_last_row - 4
             logging.info(f"Copied formulas from G4:AG4 down to row {target_last_row} ({copied_rows} additional rows)")
@@ -5,6 +5,7 @@ This module handles renaming tabs and creating blank worksheets.
 """
 
 import logging
+import re
 
 import openpyxl
 
@@ -15,11 +16,14 @@ from ..constants import (
     SHEET_LOOP_VARIABLES,
 )
 
+# Raw data tab names: "A", "B", "A" followed by up to two digits (e.g. "A1"), or "raw data" itself
+_RAW_DATA_TAB_RE = re.compile(rf"a\d{{0,2}}|b|{re.escape(SHEET_RAW_DATA)}")
+
 
 def initial_set_up(workbook: openpyxl.Workbook) -> None:
     """
     Performs initial setup on the workbook:
-    - Renames tabs "A", "B", or "raw data" to "raw data"
+    - Renames tabs "A", "B", "A1" (A plus up to two digits), or "raw data" to "raw data"
     - Renames tabs like "datamap" to "data map"
     - Adds blank tabs "column question map" and "loop variables"
 
@@ -36,8 +40,7 @@ def initial_set_up(workbook: openpyxl.Workbook) -> None:
         # Step 1: Rename tabs A, B, A1, or "raw data" to "raw data"
         for sheet_name in sheet_names:
             sheet_lower = sheet_name.lower()
-            if (sheet_lower in ['a', 'b', SHEET_RAW_DATA] or
-                sheet_lower.startswith('a') and len(sheet_lower) <= 3):
+            if _RAW_DATA_TAB_RE.fullmatch(sheet_lower):
                 if sheet_lower != SHEET_RAW_DATA:
                     workbook[sheet_name].title = SHEET_RAW_DATA
                     logging.info(f"Renamed '{sheet_name}' to '{SHEET_RAW_DATA}'")
@@ -52,7 +55,7 @@ def initial_set_up(workbook: openpyxl.Workbook) -> None:
 
         # Step 3: Add new blank tabs if they don't exist
         required_tabs = [SHEET_COLUMN_QUESTION_MAP, SHEET_LOOP_VARIABLES]
-        existing_tabs = [ws.title.lower() for ws in workbook.worksheets]
+        existing_tabs = {sheet_name.lower() for sheet_name in workbook.sheetnames}
 
         for tab_name in required_tabs:
             if tab_name.lower() not in existing_tabs:
@@ -11,6 +11,12 @@ from openpyxl.styles import Alignment
 
 from ..constants import SHEET_RAW_DATA, COL_WIDTH_NARROW
 from ..formatters.styles import create_thin_border, create_pale_blue_fill
+from ..utils.worksheet_utils import shift_cells
+
+# Header styles, built once; openpyxl copies style values into the workbook's style table on assignment
+_HEADER_BORDER = create_thin_border()
+_HEADER_FILL = create_pale_blue_fill()
+_HEADER_ALIGNMENT = Alignment(horizontal='center', vertical='center')
 
 
 def raw_data_initial_setup(workbook: openpyxl.Workbook) -> None:
@@ -27,63 +33,41 @@ def raw_data_initial_setup(workbook: openpyxl.Workbook) -> None:
         logging.info("Starting raw data initial setup...")
 
         # Get the raw data worksheet
-        if SHEET_RAW_DATA not in [ws.title for ws in workbook.worksheets]:
+        if SHEET_RAW_DATA not in workbook.sheetnames:
             logging.warning(f"No '{SHEET_RAW_DATA}' tab found, skipping raw data setup")
             return
 
         ws = workbook[SHEET_RAW_DATA]
 
-        # Insert 2 columns at the front
-        ws.insert_cols(1, 2)
-        logging.info("Inserted 2 columns at the front")
+        # Insert 2 columns at the front and 1 row at the top, moving every cell in one pass
+        shift_cells(ws, rows=1, cols=2)
+        logging.debug("Inserted 2 columns at the front and 1 row at the top")
 
         # Set width of the first 2 columns to 3
         ws.column_dimensions['A'].width = COL_WIDTH_NARROW
         ws.column_dimensions['B'].width = COL_WIDTH_NARROW
-        logging.info(f"Set width of first 2 columns to {COL_WIDTH_NARROW}")
-
-        # Insert 1 row at the top
-        ws.insert_rows(1, 1)
-        logging.info("Inserted 1 row at the top")
+        logging.debug(f"Set width of first 2 columns to {COL_WIDTH_NARROW}")
 
         # Remove gridlines from the worksheet
         ws.sheet_view.showGridLines = False
-        logging.info("Removed gridlines from worksheet")
+        logging.debug("Removed gridlines from worksheet")
 
         # Format column headers in row 2
-        # Find the actual header row (should be row 2 after inserting 1 row)
-        # But let's check both row 1 and 2 to be safe
+        # Row 1 was just inserted and is empty, so the original header row is always row 2
         header_row = 2
+        # Start from column C (3) since we inserted 2 columns
+        header_values = next(ws.iter_rows(min_row=header_row, max_row=header_row, min_col=3, values_only=True))
 
-        # Check if row 2 has headers, if not try row 1
-        has_headers_row2 = any(ws.cell(row=2, column=col).value is not None for col in range(3, ws.max_column + 1))
-        if not has_headers_row2:
-            has_headers_row1 = any(ws.cell(row=1, column=col).value is not None for col in range(3, ws.max_column + 1))
-            if has_headers_row1:
-                header_row = 1
-
-        logging.info(f"Using row {header_row} as header row")
-
-        # Find the last column with data in the header row
-        last_col = ws.max_column
-        for col in range(3, ws.max_column + 1):  # Start from column 3 (C) since we inserted 2 columns
-            if ws.cell(row=header_row, column=col).value is None:
-                last_col = col - 1
-                break
-
-        # Create formatting styles
-        thin_border = create_thin_border()
-        pale_blue_fill = create_pale_blue_fill()
-        center_alignment = Alignment(horizontal='center', vertical='center')
+        # The headers run from column C up to the first empty cell in the header row
+        header_count = next((i for i, value in enumerate(header_values) if value is None), len(header_values))
 
         # Apply formatting to all header cells in the header row
         headers_formatted = 0
-        for col in range(3, last_col + 1):  # Start from column 3 (C) since we inserted 2 columns
-            cell = ws.cell(row=header_row, column=col)
-            if cell.value is not None:  # Only format cells with content
-                cell.border = thin_border
-                cell.fill = pale_blue_fill
-                cell.alignment = center_alignment
+        for row_cells in ws.iter_rows(min_row=header_row, max_row=header_row, min_col=3, max_col=2 + header_count):
+            for cell in row_cells:
+                cell.border = _HEADER_BORDER
+                cell.fill = _HEADER_FILL
+                cell.alignment = _HEADER_ALIGNMENT
                 headers_formatted += 1
 
         logging.info(f"Formatted {headers_formatted} column headers with borders, pale blue background, and center alignment")
@@ -1,9 +1,19 @@
 """Utility functions for file operations and Excel calculations."""
 
-from .file_utils import get_next_version_filename
-from .excel_calculator import calculate_excel_formulas
+from .file_utils import get_next_version_filename, get_next_version_filenames
+from .excel_calculator import calculate_excel_formulas, workbook_digest
+from .error_handling import log_errors
+from .worksheet_utils import find_last_row_with_text, compile_row_relative_formula, fill_formulas_down, shift_cells, shift_column_refs
 
 __all__ = [
     'get_next_version_filename',
+    'get_next_version_filenames',
     'calculate_excel_formulas',
+    'workbook_digest',
+    'log_errors',
+    'find_last_row_with_text',
+    'compile_row_relative_formula',
+    'fill_formulas_down',
+    'shift_cells',
+    'shift_column_refs',
 ]
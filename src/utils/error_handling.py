@@ -0,0 +1,40 @@
+"""
+Error handling helpers for the survey data processor.
+
+This module provides the decorator used to log failures of processing steps.
+"""
+
+import functools
+import inspect
+import logging
+
+
+def log_errors(description: str):
+    """
+    Decorator that logs an exception raised by the wrapped function and re-raises it.
+
+    The description is formatted with the call's arguments only when an error occurs,
+    e.g. "loading Excel file {file_path}" logs "Error loading Excel file <path>: <error>".
+
+    Args:
+        description (str): What the function was doing, with optional {argument} placeholders
+
+    Returns:
+        callable: Decorator applying the logging wrapper
+    """
+    def decorator(func):
+        signature = inspect.signature(func)
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            try:
+                return func(*args, **kwargs)
+            except Exception as e:
+                bound = signature.bind(*args, **kwargs)
+                bound.apply_defaults()
+                logging.error(f"Error {description.format(**bound.arguments)}: {e}")
+                raise
+
+        return wrapper
+
+    return decorator
@@ -4,33 +4,84 @@ Excel formula calculation utilities.
 This module provides functions to calculate Excel formulas using win32com.
 """
 
+import hashlib
 import logging
 import os
+import shutil
+import tempfile
 import time
+import zipfile
+from pathlib import Path
+from typing import Optional
 
-from ..constants import WIN32_AVAILABLE
+from .. import constants
 
-if WIN32_AVAILABLE:
-    import win32com.client
+# Calculated workbooks keyed by the digest of the uncalculated file
+CALC_CACHE_DIR = Path.home() / '.cache' / 'survey-data-processor' / 'calc'
+
+# Package parts that change on every save without changing the workbook's content
+_VOLATILE_PARTS = {'docProps/core.xml'}
+
+
+def workbook_digest(file_path: str) -> str:
+    """
+    Hashes the content of an xlsx file, ignoring the save timestamps in its document properties.
+
+    Args:
+        file_path (str): Path to the Excel file
+
+    Returns:
+        str: Hex digest identifying the workbook content
+    """
+    digest = hashlib.blake2b(digest_size=16)
+    with zipfile.ZipFile(file_path) as package:
+        for name in sorted(package.namelist()):
+            if name in _VOLATILE_PARTS:
+                continue
+            digest.update(name.encode())
+            digest.update(package.read(name))
+    return digest.hexdigest()
 
 
-def calculate_excel_formulas(file_path: str) -> None:
+def calculate_excel_formulas(file_path: str, use_cache: bool = True) -> bool:
     """
     Opens Excel to calculate all formulas in the workbook before proceeding with question cutting.
     This ensures that all formulas (especially column G lookups) are properly evaluated.
 
+    Calculated results are cached by workbook content in CALC_CACHE_DIR, so re-running the same
+    input copies the earlier result instead of starting Excel. Without pywin32 the cache can never
+    be filled, so it is not checked.
+
     Args:
         file_path (str): Path to the Excel file to calculate
+        use_cache (bool): Whether to reuse and store calculated workbooks
+
+    Returns:
+        bool: True if the file now holds calculated values, False if the calculation was skipped or failed
     """
-    if not WIN32_AVAILABLE:
+    if not constants.WIN32_AVAILABLE:
         logging.warning("win32com.client not available - skipping Excel calculation. Install pywin32 for full functionality.")
-        return
+        return False
+
+    cache_path: Optional[Path] = None
+    if use_cache:
+        try:
+            cache_path = CALC_CACHE_DIR / f"{workbook_digest(file_path)}{Path(file_path).suffix}"
+            if cache_path.exists():
+                shutil.copyfile(cache_path, file_path)
+                logging.info(f"Reused calculated workbook from cache: {cache_path}")
+                return True
+        except Exception as e:
+            logging.warning(f"Could not check the calculation cache: {e}")
+            cache_path = None
+
+    import win32com.client
 
     try:
         logging.info("Opening Excel to calculate all formulas...")
 
-        # Create Excel application
-        excel_app = win32com.client.Dispatch("Excel.Application")
+        # Start a separate Excel instance; Dispatch would attach to one that another process may quit
+        excel_app = win32com.client.DispatchEx("Excel.Application")
         excel_app.Visible = False  # Keep Excel hidden
         excel_app.DisplayAlerts = False  # Disable alerts
 
@@ -56,7 +107,26 @@ def calculate_excel_formulas(file_path: str) -> None:
 
         logging.info("Excel calculation completed successfully")
 
+        if cache_path is not None:
+            try:
+                cache_path.parent.mkdir(parents=True, exist_ok=True)
+                # Copy to a temporary file and rename it into place, so a concurrent run never reads a partial entry
+                fd, temp_path = tempfile.mkstemp(dir=cache_path.parent, suffix=cache_path.suffix)
+                os.close(fd)
+                try:
+                    shutil.copyfile(file_path, temp_path)
+                    os.replace(temp_path, cache_path)
+                except OSError:
+                    os.unlink(temp_path)
+                    raise
+                logging.info(f"Cached calculated workbook: {cache_path}")
+            except OSError as e:
+                logging.warning(f"Could not cache calculated workbook: {e}")
+
+        return True
+
     except Exception as e:
         logging.error(f"Error during Excel calculation: {e}")
         # Don't raise the error - continue with processing even if Excel calculation fails
         logging.warning("Continuing without Excel calculation - formulas may not be evaluated")
+        return False
@@ -5,6 +5,7 @@ This module provides functions for file operations like versioning.
 """
 
 from pathlib import Path
+from typing import List
 
 
 def get_next_version_filename(base_name: str = "test_processed_pilot") -> str:
@@ -27,3 +28,30 @@ def get_next_version_filename(base_name: str = "test_processed_pilot") -> str:
         if not filepath.exists():
             return str(filepath)
         version += 1
+
+
+def get_next_version_filenames(count: int, base_name: str = "test_processed_pilot") -> List[str]:
+    """
+    Gets the next count unused versioned filenames in the output directory.
+
+    Used when several files are processed at once, so each output gets its own version
+    before any of them exists on disk.
+
+    Args:
+        count (int): Number of filenames to reserve
+        base_name (str): Base name for the files (without extension)
+
+    Returns:
+        list: Full paths to the next count unused versioned files
+    """
+    output_dir = Path("output")
+    output_dir.mkdir(exist_ok=True)
+
+    filepaths = []
+    version = 1
+    while len(filepaths) < count:
+        filepath = output_dir / f"{base_name}v{version}.xlsx"
+        if not filepath.exists():
+            filepaths.append(str(filepath))
+        version += 1
+    return filepaths
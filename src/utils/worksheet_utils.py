@@ -0,0 +1,177 @@
+"""
+Worksheet utility functions for the survey data processor.
+
+This module provides helpers for locating content and copying formulas on openpyxl worksheets.
+"""
+
+import re
+from functools import lru_cache
+from typing import Tuple
+
+import openpyxl
+from openpyxl.cell import Cell
+from openpyxl.utils import get_column_letter, column_index_from_string
+
+# Column+row references (e.g. C3, M4); a "$" before the row number keeps it from matching
+_CELL_REF_RE = re.compile(r'([A-Z]+)(\d+)')
+
+# Column references with a relative column and an absolute row, e.g. D$16.
+# The lookbehind skips absolute columns like $G$4 and the tail of multi-letter ones like $AJC$2.
+_COL_REF_RE = re.compile(r'(?<![$A-Z])([A-Z]+)(\$)(\d+)')
+
+# Filter Q row formula: looks up the English question text of the Filter Column entry
+FILTER_Q_TEMPLATE = '=IF(D${filter_col_row}="record", "No filter", OFFSET(\'data map\'!$C$2, MATCH(D${filter_col_row}, \'data map\'!$L$2:$L$3200, 0)-1, 0))'
+
+# HumRead Filter header formula: looks up the response text of the selected filter value
+FILTER_HEADER_TEMPLATE = '=IF(D${filter_row}="<>", "No filter", OFFSET(\'data map\'!$E$2, MATCH(D${filter_col_row}, \'data map\'!$L$2:$L$3200, 0)+D${filter_row},0))'
+
+
+def find_last_row_with_text(ws: openpyxl.worksheet.worksheet.Worksheet, column: int = 3) -> int:
+    """
+    Finds the last row with non-blank text in a column.
+
+    Scans upward from the worksheet's max_row, so only the trailing empty rows are visited.
+
+    Args:
+        ws (openpyxl.worksheet.worksheet.Worksheet): The worksheet to scan
+        column (int): Column number to check (defaults to column C)
+
+    Returns:
+        int: The last row with text, or 1 if the column has none
+    """
+    for row in range(ws.max_row, 0, -1):
+        value = ws.cell(row=row, column=column).value
+        if value is not None and str(value).strip():
+            return row
+    return 1
+
+
+def compile_row_relative_formula(formula: str) -> Tuple[str, Tuple[int, ...]]:
+    """
+    Splits a formula into a format template and the row numbers of its relative references.
+
+    Every column+row reference without a "$" before the row (e.g. C3, $E3) gets a positional
+    placeholder, so the formula for another row is template.format(*(row + offset for row in rows)).
+
+    Args:
+        formula (str): The formula to compile
+
+    Returns:
+        tuple: The format template and the row numbers of its relative references
+    """
+    parts = []
+    rows = []
+    position = 0
+    for match in _CELL_REF_RE.finditer(formula):
+        parts.append(formula[position:match.start(2)].replace('{', '{{').replace('}', '}}'))
+        parts.append('{}')
+        rows.append(int(match.group(2)))
+        position = match.end()
+    parts.append(formula[position:].replace('{', '{{').replace('}', '}}'))
+    return ''.join(parts), tuple(rows)
+
+
+def fill_formulas_down(ws: openpyxl.worksheet.worksheet.Worksheet, source_row: int, min_col: int, max_col: int, last_row: int) -> None:
+    """
+    Copies the formulas of a source row down to every row below it, adjusting relative row references.
+
+    Each formula is compiled once, so the rows below are built by formatting integers into a
+    template rather than re-scanning the formula. Source cells without a formula are not copied.
+    Target cells that do not exist yet are created directly and added to the worksheet in one
+    update, bypassing the per-call lookup of ws.cell; existing cells keep their style.
+
+    Args:
+        ws (openpyxl.worksheet.worksheet.Worksheet): The worksheet to fill
+        source_row (int): Row holding the formulas to copy
+        min_col (int): First column of the formula range
+        max_col (int): Last column of the formula range
+        last_row (int): Last row to fill
+    """
+    source_values = next(ws.iter_rows(min_row=source_row, max_row=source_row, min_col=min_col, max_col=max_col, values_only=True))
+    templates = [
+        (column, *compile_row_relative_formula(value))
+        for column, value in enumerate(source_values, start=min_col)
+        if value and isinstance(value, str) and value.startswith('=')
+    ]
+
+    existing_cells = ws._cells
+    new_cells = {}
+    for target_row in range(source_row + 1, last_row + 1):
+        row_offset = target_row - source_row
+        for column, template, rows in templates:
+            formula = template.format(*[row + row_offset for row in rows])
+            cell = existing_cells.get((target_row, column))
+            if cell is None:
+                new_cells[(target_row, column)] = Cell(ws, row=target_row, column=column, value=formula)
+            else:
+                cell.value = formula
+    existing_cells.update(new_cells)
+
+
+def shift_cells(ws: openpyxl.worksheet.worksheet.Worksheet, rows: int = 0, cols: int = 0) -> None:
+    """
+    Moves every cell on the worksheet down by rows and right by cols.
+
+    Gives the same cell contents and styles as ws.insert_rows(1, rows) plus ws.insert_cols(1, cols),
+    but re-keys each existing cell once: the inserts each build every cell of the used range,
+    empty ones included, and move them one by one. Like the inserts, formulas, merged ranges and
+    row/column dimensions are not adjusted.
+
+    Args:
+        ws (openpyxl.worksheet.worksheet.Worksheet): The worksheet to shift
+        rows (int): Number of empty rows to open at the top
+        cols (int): Number of empty columns to open at the left
+    """
+    if not rows and not cols:
+        return
+
+    shifted_cells = {}
+    for cell in ws._cells.values():
+        cell.row += rows
+        cell.column += cols
+        shifted_cells[(cell.row, cell.column)] = cell
+    ws._cells = shifted_cells
+
+
+@lru_cache(maxsize=None)
+def _shift_column_letter(col_letter: str, col_offset: int) -> str:
+    """
+    Returns the column letter col_offset columns to the right of col_letter, memoized
+    since the drag only ever shifts a handful of letters by 1-10.
+
+    Args:
+        col_letter: The column letter, e.g. "D"
+        col_offset: Number of columns to shift by
+
+    Returns:
+        str: The shifted column letter, e.g. "E" for "D" with an offset of 1
+    """
+    return get_column_letter(column_index_from_string(col_letter) + col_offset)
+
+
+def _shift_column_ref(match: re.Match, col_offset: int) -> str:
+    """
+    Returns a matched D$16-style reference moved col_offset columns to the right.
+
+    Args:
+        match: A _COL_REF_RE match
+        col_offset: Number of columns to shift by
+
+    Returns:
+        str: The shifted reference, e.g. E$16 for D$16 with an offset of 1
+    """
+    return f"{_shift_column_letter(match.group(1), col_offset)}{match.group(2)}{match.group(3)}"
+
+
+def shift_column_refs(formula: str, col_offset: int) -> str:
+    """
+    Shifts the relative-column references in a formula, as dragging it col_offset columns right would.
+
+    Args:
+        formula: The formula to adjust
+        col_offset: Number of columns to shift by
+
+    Returns:
+        str: The adjusted formula
+    """
+    return _COL_REF_RE.sub(lambda match: _shift_column_ref(match, col_offset), formula)